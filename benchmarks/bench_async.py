@@ -0,0 +1,166 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+"""
+Benchmark of UrlPermissionMiddleware under ASGI.
+
+Compares the native async path with the same middleware forced into
+sync-only mode, where Django runs it in the thread pool. Requests are
+driven concurrently by Django's in-process AsyncClient against a
+temporary SQLite database.
+
+    python benchmarks/bench_async.py --requests 2000 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.http import HttpResponse  # noqa: E402
+from django.urls import path  # noqa: E402
+
+from django_url_group_permissions.decorators import url_permission_required  # noqa: E402
+
+
+@url_permission_required
+async def protected(request, pk):
+    return HttpResponse('ok')
+
+
+urlpatterns = [
+    path('items/<int:pk>/', protected),
+]
+
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+]
+
+
+def configure(database):
+    settings.configure(
+        SECRET_KEY='benchmark',
+        ALLOWED_HOSTS=['*'],
+        INSTALLED_APPS=[
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'django.contrib.sessions',
+            'django_url_group_permissions',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': database}},
+        ROOT_URLCONF=__name__,
+        MIDDLEWARE=MIDDLEWARE,
+        USE_TZ=True,
+        DEFAULT_AUTO_FIELD='django.db.models.AutoField',
+    )
+    django.setup()
+
+
+def define_sync_only_middleware():
+    from django_url_group_permissions.middleware import UrlPermissionMiddleware
+
+    class SyncOnlyUrlPermissionMiddleware(UrlPermissionMiddleware):
+        async_capable = False
+
+    globals()['SyncOnlyUrlPermissionMiddleware'] = SyncOnlyUrlPermissionMiddleware
+
+
+def create_fixtures():
+    from django.contrib.auth.models import Group, User
+    from django.core.management import call_command
+    from django_url_group_permissions.models import GroupUrlPermissions
+
+    call_command('migrate', verbosity=0)
+    group = Group.objects.create(name='benchmark')
+    GroupUrlPermissions.objects.create(group=group, url='items/<int:pk>/', http_method='GET')
+    user = User.objects.create_user('benchmark')
+    user.groups.add(group)
+    return user
+
+
+async def drive(client, total, concurrency):
+    latencies = []
+    statuses = set()
+    queue = iter(range(total))
+
+    async def worker():
+        for index in queue:
+            start = time.perf_counter()
+            response = await client.get(f'/items/{index}/')
+            latencies.append(time.perf_counter() - start)
+            statuses.add(response.status_code)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        'requests': total,
+        'concurrency': concurrency,
+        'statuses': sorted(statuses),
+        'throughput_rps': round(total / elapsed, 1),
+        'p50_ms': round(latencies[len(latencies) // 2] * 1000, 3),
+        'p99_ms': round(latencies[int(len(latencies) * 0.99)] * 1000, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--engine', default='database')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(os.path.join(directory, 'benchmark.sqlite3'))
+        settings.URL_PERMISSION_ENGINE = args.engine
+        user = create_fixtures()
+        define_sync_only_middleware()
+
+        from django.test import AsyncClient
+        from django.test.utils import override_settings
+
+        for name, middleware in (
+            ('async', 'django_url_group_permissions.middleware.UrlPermissionMiddleware'),
+            ('sync', f'{__name__}.SyncOnlyUrlPermissionMiddleware'),
+        ):
+            with override_settings(MIDDLEWARE=MIDDLEWARE + [middleware]):
+                client = AsyncClient()
+                client.force_login(user)
+                result = asyncio.run(drive(client, args.requests, args.concurrency))
+            print(json.dumps({'path': name, 'engine': args.engine, **result}))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+"""
+Microbenchmark for matching.UrlMatcher.
+
+Compiles synthetic rule sets of increasing size and measures the lookup
+time per path. Lookups should stay flat as the rule count grows.
+
+    python benchmarks/bench_matcher.py --rules 1000 10000 50000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from django_url_group_permissions.matching import UrlMatcher  # noqa: E402
+
+WORDS = ['api', 'v1', 'v2', 'users', 'orders', 'items', 'reports', 'admin',
+         'billing', 'search', 'export', 'settings', 'teams', 'files', 'edit']
+
+
+def make_rules(count, seed=0):
+    rng = random.Random(seed)
+    rules = []
+    for index in range(count):
+        segments = [rng.choice(WORDS) for _ in range(rng.randint(1, 4))]
+        segments.append(f'r{index}')
+        kind = index % 10
+        if kind == 0:
+            segments.insert(1, '*')
+        elif kind == 1:
+            segments.insert(1, '<int:pk>')
+        elif kind == 2:
+            segments.append('**')
+        rules.append(('/'.join(segments) + '/', index))
+    return rules
+
+
+def to_path(pattern, rng):
+    segments = []
+    for segment in pattern.split('/'):
+        if segment in ('*', '**'):
+            segment = rng.choice(WORDS)
+        elif segment.startswith('<'):
+            segment = str(rng.randint(1, 10 ** 6))
+        segments.append(segment)
+    return '/' + '/'.join(segments)
+
+
+def run(count, lookups):
+    rules = make_rules(count)
+    start = time.perf_counter()
+    matcher = UrlMatcher(rules)
+    compile_seconds = time.perf_counter() - start
+
+    rng = random.Random(1)
+    paths = [to_path(rng.choice(rules)[0], rng) for _ in range(lookups // 2)]
+    paths += ['/missing/' + rng.choice(WORDS) + '/' for _ in range(lookups - len(paths))]
+
+    start = time.perf_counter()
+    matched = sum(1 for path in paths if matcher.match(path))
+    lookup_seconds = time.perf_counter() - start
+
+    return {
+        'rules': count,
+        'lookups': lookups,
+        'matched': matched,
+        'compile_ms': round(compile_seconds * 1000, 3),
+        'lookup_us': round(lookup_seconds / lookups * 1e6, 3),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rules', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--lookups', type=int, default=20000)
+    args = parser.parse_args()
+    for count in args.rules:
+        print(json.dumps(run(count, args.lookups)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,315 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+"""
+Benchmark suite for UrlPermissionMiddleware.
+
+Builds synthetic URLconfs, groups and permission tables on a temporary
+SQLite database and measures the middleware for four kinds of request:
+
+- allowed: a protected view the user's groups may GET
+- denied: a protected view none of the user's groups may GET
+- exempt: a path under URL_PERMISSION_EXEMPT_URLS
+- undecorated: a view without @url_permission_required
+
+For every combination of routes, groups per user, permission rows and
+engine it reports latency percentiles, queries per request and
+throughput as JSON, so results can be compared between releases.
+
+    python benchmarks/bench_middleware.py --routes 100 1000 --groups 1 10 \\
+        --rules 1000 100000 --engines database snapshot --output results.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+
+EXEMPT_PREFIX = '/exempt/'
+KINDS = ('allowed', 'denied', 'exempt', 'undecorated')
+
+
+def configure(database):
+    settings.configure(
+        SECRET_KEY='benchmark',
+        ALLOWED_HOSTS=['*'],
+        INSTALLED_APPS=[
+            'django.contrib.auth',
+            'django.contrib.contenttypes',
+            'django_url_group_permissions',
+        ],
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': database}},
+        ROOT_URLCONF=None,
+        URL_PERMISSION_EXEMPT_URLS=[EXEMPT_PREFIX],
+        USE_TZ=True,
+        DEFAULT_AUTO_FIELD='django.db.models.AutoField',
+    )
+    django.setup()
+
+
+def build_urlconf(route_count):
+    """Register a module with `route_count` routes and return its name."""
+    from django.http import HttpResponse
+    from django.urls import include, path
+
+    from django_url_group_permissions.decorators import url_permission_required
+
+    def view(request, **kwargs):
+        return HttpResponse()
+
+    protected = url_permission_required(lambda request, **kwargs: HttpResponse())
+
+    # Nest routes in sections of 50, like a project with many apps
+    sections = []
+    for section in range(max(route_count // 50, 1)):
+        patterns = [
+            path(f'r{index}/<int:pk>/', protected if index % 4 else view)
+            for index in range(section * 50, min((section + 1) * 50, route_count))
+        ]
+        sections.append(path(f's{section}/', include(patterns)))
+    sections.append(path(EXEMPT_PREFIX[1:] + '<path:rest>', protected))
+
+    name = f'bench_urls_{route_count}'
+    module = types.ModuleType(name)
+    module.urlpatterns = sections
+    sys.modules[name] = module
+    return name
+
+
+def route(index):
+    return f's{index // 50}/r{index}/<int:pk>/'
+
+
+def load_data(route_count, group_count, rule_count, seed=0):
+    """Create the user, groups and rules; return the routes to request."""
+    from django.contrib.auth.models import Group, User
+
+    from django_url_group_permissions.models import GroupUrlPermissions
+    from django_url_group_permissions.signals import notify_url_permissions_changed
+
+    rng = random.Random(seed)
+    GroupUrlPermissions.objects.all().delete()
+    Group.objects.all().delete()
+    User.objects.all().delete()
+
+    # The user's groups plus as many other groups, so rows belong to both
+    groups = Group.objects.bulk_create([Group(name=f'g{index}') for index in range(group_count * 2)])
+    user = User.objects.create_user('benchmark')
+    user.groups.set(groups[:group_count])
+
+    protected = [index for index in range(route_count) if index % 4]
+    allowed = protected[: max(len(protected) // 2, 1)]
+    denied = protected[len(allowed):] or protected[-1:]
+    undecorated = [index for index in range(route_count) if not index % 4]
+
+    def rows():
+        methods = [method for method, _ in GroupUrlPermissions.HTTP_METHODS]
+        for index in allowed:
+            yield GroupUrlPermissions(group=rng.choice(groups[:group_count]), url=route(index), http_method='GET')
+        created = len(allowed)
+        index = 0
+        while created < rule_count:
+            # Filler rows on other groups, or on URLs that aren't routed
+            group = groups[group_count + index % group_count]
+            yield GroupUrlPermissions(
+                group=group,
+                url=route(rng.randrange(route_count)) if index % 2 else f'unrouted/{index}/',
+                http_method=methods[index % len(methods)],
+            )
+            created += 1
+            index += 1
+
+    batch = []
+    seen = set()
+    for row in rows():
+        key = (row.group_id, row.url, row.http_method)
+        if key in seen:
+            continue
+        seen.add(key)
+        batch.append(row)
+        if len(batch) >= 5000:
+            GroupUrlPermissions.objects.bulk_create(batch)
+            batch = []
+    GroupUrlPermissions.objects.bulk_create(batch)
+    notify_url_permissions_changed()
+
+    def paths(indexes):
+        return [f'/s{index // 50}/r{index}/{rng.randint(1, 10 ** 6)}/' for index in indexes]
+
+    return user, {
+        'allowed': paths(allowed),
+        'denied': paths(denied),
+        'exempt': [f'{EXEMPT_PREFIX}{index}/' for index in range(50)],
+        'undecorated': paths(undecorated) if undecorated else [],
+    }
+
+
+def percentile(values, fraction):
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def measure(middleware, user, paths, requests):
+    from django.db import connection
+    from django.test import RequestFactory
+    from django.test.utils import CaptureQueriesContext
+
+    factory = RequestFactory()
+    rng = random.Random(2)
+    prepared = []
+    for _ in range(requests):
+        request = factory.get(rng.choice(paths))
+        request.user = user
+        prepared.append(request)
+
+    latencies = []
+    statuses = set()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        for request in prepared:
+            before = time.perf_counter()
+            statuses.add(middleware(request).status_code)
+            latencies.append(time.perf_counter() - before)
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        'statuses': sorted(statuses),
+        'queries_per_request': round(len(queries.captured_queries) / requests, 3),
+        'throughput_rps': round(requests / elapsed, 1),
+        'p50_us': round(percentile(latencies, 0.50) * 1e6, 1),
+        'p90_us': round(percentile(latencies, 0.90) * 1e6, 1),
+        'p99_us': round(percentile(latencies, 0.99) * 1e6, 1),
+        'max_us': round(latencies[-1] * 1e6, 1),
+    }
+
+
+def handler(middleware_class):
+    """Build the middleware the way Django's handler does, view middleware included."""
+    from django.http import HttpResponseNotFound
+    from django.urls import Resolver404, get_resolver
+
+    def get_response(request):
+        try:
+            request.resolver_match = get_resolver().resolve(request.path_info)
+        except Resolver404:
+            return HttpResponseNotFound()
+        callback, args, kwargs = request.resolver_match
+        response = middleware.process_view(request, callback, args, kwargs)
+        return response if response is not None else callback(request, *args, **kwargs)
+
+    middleware = middleware_class(get_response)
+    return middleware
+
+
+def run(args):
+    from django.test.utils import override_settings
+    from django.urls import clear_url_caches
+
+    from django_url_group_permissions.middleware import UrlPermissionMiddleware
+
+    results = []
+    for route_count in args.routes:
+        urlconf = build_urlconf(route_count)
+        for group_count in args.groups:
+            for rule_count in args.rules:
+                user, paths = load_data(route_count, group_count, rule_count)
+                for engine in args.engines:
+                    with override_settings(
+                        ROOT_URLCONF=urlconf,
+                        URL_PERMISSION_ENGINE=engine,
+                        URL_PERMISSION_MODE=args.mode,
+                    ):
+                        clear_url_caches()
+                        middleware = handler(UrlPermissionMiddleware)
+                        # Warm up resolver, caches and snapshot
+                        measure(middleware, user, paths['allowed'], 20)
+                        for kind in KINDS:
+                            if not paths[kind]:
+                                continue
+                            result = {
+                                'routes': route_count,
+                                'groups': group_count,
+                                'rules': rule_count,
+                                'engine': engine,
+                                'mode': args.mode,
+                                'path': kind,
+                                'requests': args.requests,
+                                **measure(middleware, user, paths[kind], args.requests),
+                            }
+                            results.append(result)
+                            print(json.dumps(result), file=sys.stderr)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--routes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--groups', type=int, nargs='+', default=[1, 10, 50])
+    parser.add_argument('--rules', type=int, nargs='+', default=[1000, 100000])
+    parser.add_argument('--engines', nargs='+', default=['database'])
+    parser.add_argument('--mode', default='request', choices=['request', 'view'])
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per path kind.')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure(os.path.join(directory, 'benchmark.sqlite3'))
+        from django.core.management import call_command
+        call_command('migrate', verbosity=0)
+
+        report = {
+            'meta': {
+                'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'sqlite': sqlite3.sqlite_version,
+                'platform': platform.platform(),
+                'arguments': vars(args),
+            },
+            'results': run(args),
+        }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
@@ -24,30 +24,165 @@
 # This source code is part of the "django_url_group_permissions" project.
 # Intellectual property of IT ELAZOS SL.
 
+from itertools import islice
+
+from django import forms
 from django.contrib import admin
-from django.urls import URLPattern, URLResolver
-from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.core.paginator import Paginator
+from django.db import connections, models, transaction
+from django.http import JsonResponse
+from django.urls import path, reverse
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.translation import ngettext
+from .catalog import get_clean_url, get_url_catalog
 from .models import *
 from django.contrib.auth.admin import GroupAdmin
 from django.contrib.auth.models import Group
 from django.contrib import admin
-from .models import GroupUrlPermissions
+from .models import (
+    GroupUrlPermissionMask, GroupUrlPermissions, UrlPermissionAuditLog, UrlRoute,
+    bits_to_methods, get_permission_model, methods_to_bits,
+)
+from .signals import notify_url_permissions_changed
 from django.utils.translation import gettext_lazy as _
 
 
+def save_group_url_permissions(group, chosen, batch_size=500):
+    """
+    Make the group's URL permissions match `chosen`, a set of (url, method).
+
+    Only the difference with the existing rows is written, in one
+    transaction, so unchanged rows keep their is_active, description and
+    created_at. Returns the number of created and deleted rows.
+    """
+    if get_permission_model() is GroupUrlPermissionMask:
+        return save_group_url_permission_masks(group, chosen, batch_size)
+
+    with transaction.atomic():
+        existing = {
+            (url, http_method): pk
+            for pk, url, http_method in GroupUrlPermissions.objects.filter(
+                group=group,
+            ).values_list('pk', 'url', 'http_method')
+        }
+        to_delete = [pk for key, pk in existing.items() if key not in chosen]
+        to_create = [
+            GroupUrlPermissions(group=group, url=url, http_method=method)
+            for url, method in chosen
+            if (url, method) not in existing
+        ]
+        for start in range(0, len(to_delete), batch_size):
+            GroupUrlPermissions.objects.filter(
+                pk__in=to_delete[start:start + batch_size],
+            ).delete()
+        GroupUrlPermissions.objects.bulk_create(to_create, batch_size=batch_size)
+
+        if to_create:
+            # bulk_create doesn't send post_save
+            notify_url_permissions_changed()
+    return len(to_create), len(to_delete)
+
+
+def save_group_url_permission_masks(group, chosen, batch_size=500):
+    """save_group_url_permissions for the bitmask storage."""
+    wanted = {}
+    for url, method in chosen:
+        wanted[url] = wanted.get(url, 0) | methods_to_bits([method])
+
+    with transaction.atomic():
+        existing = {
+            url: (pk, methods)
+            for pk, url, methods in GroupUrlPermissionMask.objects.filter(
+                group=group,
+            ).values_list('pk', 'url', 'methods')
+        }
+        to_delete = [pk for url, (pk, _) in existing.items() if url not in wanted]
+        to_update = [
+            GroupUrlPermissionMask(pk=existing[url][0], methods=methods)
+            for url, methods in wanted.items()
+            if url in existing and existing[url][1] != methods
+        ]
+        to_create = [
+            GroupUrlPermissionMask(group=group, url=url, methods=methods)
+            for url, methods in wanted.items()
+            if url not in existing
+        ]
+        for start in range(0, len(to_delete), batch_size):
+            GroupUrlPermissionMask.objects.filter(
+                pk__in=to_delete[start:start + batch_size],
+            ).delete()
+        GroupUrlPermissionMask.objects.bulk_update(to_update, ['methods'], batch_size=batch_size)
+        GroupUrlPermissionMask.objects.bulk_create(to_create, batch_size=batch_size)
+
+        if to_create or to_update:
+            # bulk_create and bulk_update don't send post_save
+            notify_url_permissions_changed()
+    return len(to_create), len(to_delete)
+
+
 class CustomGroupAdmin(GroupAdmin):
+    url_permissions_batch_size = 500
+    url_permissions_page_size = 100
+
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
         return form
 
     def get_clean_url(self, url_path):
         """Remove language prefix if present and clean the URL path."""
-        if hasattr(settings, 'LANGUAGES'):
-            for lang_code, _ in settings.LANGUAGES:
-                prefix = f'{lang_code}/'
-                if url_path.startswith(prefix):
-                    return url_path[len(prefix):]
-        return url_path
+        return get_clean_url(url_path)
+
+    def get_urls(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return [
+            path(
+                'url-permissions/autocomplete/',
+                self.admin_site.admin_view(self.url_permissions_autocomplete_view),
+                name='%s_%s_url_permissions_autocomplete' % info,
+            ),
+        ] + super().get_urls()
+
+    def url_permissions_autocomplete_view(self, request):
+        """
+        Search the URL catalog and return one page of 'url|method' entries.
+
+        GET parameters: `term` to filter on and `page` (1-based). The
+        selector leaves out the entries that are already chosen.
+        """
+        if not (self.has_view_permission(request) or self.has_add_permission(request)):
+            raise PermissionDenied
+
+        term = request.GET.get('term', '')
+        try:
+            page = max(int(request.GET.get('page', 1)), 1)
+        except ValueError:
+            page = 1
+
+        start = (page - 1) * self.url_permissions_page_size
+        # Read one entry past the page to know if there are more
+        entries = list(islice(
+            get_url_catalog().search(term),
+            start,
+            start + self.url_permissions_page_size + 1,
+        ))
+        return JsonResponse({
+            'results': entries[:self.url_permissions_page_size],
+            'more': len(entries) > self.url_permissions_page_size,
+        })
+
+    def get_url_permissions_context(self):
+        info = self.model._meta.app_label, self.model._meta.model_name
+        return {
+            'url_permissions_autocomplete_url': reverse(
+                '%s:%s_%s_url_permissions_autocomplete' % ((self.admin_site.name,) + info)
+            ),
+        }
+
+    def add_view(self, request, form_url='', extra_context=None):
+        extra_context = {**self.get_url_permissions_context(), **(extra_context or {})}
+        return super().add_view(request, form_url, extra_context=extra_context)
 
     def change_view(self, request, object_id, form_url='', extra_context=None):
         extra_context = extra_context or {}
@@ -57,68 +192,25 @@ class CustomGroupAdmin(GroupAdmin):
         
         if group:
             # Get chosen URL permissions
-            chosen_url_permissions = GroupUrlPermissions.objects.filter(group=group)
-            
-            # Get HTTP methods from model
-            http_methods = [method[0] for method in GroupUrlPermissions.HTTP_METHODS]
-            
-            # Get all URLs using the recursive method
-            available_urls = set()
-            urlconf = __import__(settings.ROOT_URLCONF, {}, {}, [''])
+            model = get_permission_model()
+            chosen_url_permissions = model.expand_grants(model.objects.filter(
+                group=group,
+            ).values_list(*model.grant_fields))
             
-            def list_urls(patterns, acc=None):
-                if acc is None:
-                    acc = []
-                if not patterns:
-                    return
-                pattern = patterns[0]
-                if isinstance(pattern, URLPattern):
-                    url_path = ''.join(acc + [str(pattern.pattern)])
-                    # Clean URL path
-                    clean_url = self.get_clean_url(url_path)
-                    # Add all HTTP methods for user-defined URLs
-                    for method in http_methods:
-                        available_urls.add((clean_url, method))
-                            
-                elif isinstance(pattern, URLResolver):
-                    yield from list_urls(pattern.url_patterns, acc + [str(pattern.pattern)])
-                yield from list_urls(patterns[1:], acc)
-            
-            # Process all URL patterns
-            for _ in list_urls(urlconf.urlpatterns):
-                pass
-            
-            # Convert set to list of dictionaries
-            available_urls = [
-                {
-                    'id': f"{url}|{method}",
-                    'url': url,
-                    'http_method': method,
-                }
-                for url, method in available_urls
-            ]
-            
-            # Filter out URLs that are already chosen
             chosen_url_methods = []
-            for perm in chosen_url_permissions:
-                clean_url = self.get_clean_url(perm.url)
+            for url, http_method in chosen_url_permissions:
+                clean_url = self.get_clean_url(url)
                 chosen_url_methods.append({
-                    'id': f"{clean_url}|{perm.http_method}",
+                    'id': f"{clean_url}|{http_method}",
                     'url': clean_url,
-                    'http_method': perm.http_method,
+                    'http_method': http_method,
                 })       
 
-            # Create a set of chosen IDs for efficient lookup
-            chosen_ids = {item['id'] for item in chosen_url_methods}
-
-            available_url_permissions = [
-                url for url in available_urls 
-                if f"{url['url']}|{url['http_method']}" not in chosen_ids
-            ]
-            
+            # Available permissions are loaded page by page from the
+            # autocomplete view
             extra_context.update({
-                'available_url_permissions': available_url_permissions,
-                'chosen_url_permissions': chosen_url_methods
+                'chosen_url_permissions': chosen_url_methods,
+                **self.get_url_permissions_context(),
             })
         
         return super().change_view(
@@ -128,25 +220,128 @@ class CustomGroupAdmin(GroupAdmin):
     def save_model(self, request, obj, form, change):
         super().save_model(request, obj, form, change)
         
-        # Clear all existing URL permissions for this group
-        GroupUrlPermissions.objects.filter(group=obj).delete()
-        
         # get the list of url and method from the form
-        chosen_permissions = request.POST.getlist('url_permissions')
-
-        if chosen_permissions:
-            for perm_id in chosen_permissions:
-                if perm_id:  # Only process non-empty values
-                    url, method = perm_id.split('|')
-                    # Store URL without language prefix
-                    clean_url = self.get_clean_url(url)
-                    GroupUrlPermissions.objects.create(
-                        group=obj,
-                        url=clean_url,
-                        http_method=method
-                    )
+        chosen = set()
+        for perm_id in request.POST.getlist('url_permissions'):
+            if perm_id:  # Only process non-empty values
+                url, method = perm_id.split('|')
+                # Store URL without language prefix
+                chosen.add((self.get_clean_url(url), method))
+
+        # "Choose all" sends the filter instead of every matching option
+        for term in request.POST.getlist('url_permissions_matching'):
+            chosen.update(
+                (entry['url'], entry['http_method'])
+                for entry in get_url_catalog().search(term)
+            )
+
+        save_group_url_permissions(obj, chosen, batch_size=self.url_permissions_batch_size)
                 
 
+def estimate_count(model, using):
+    """
+    Return the row count of the model's table from the database statistics,
+    or None when the backend doesn't keep one.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute('SELECT reltuples FROM pg_class WHERE oid = %s::regclass', [table])
+        elif connection.vendor == 'mysql':
+            cursor.execute(
+                'SELECT table_rows FROM information_schema.tables '
+                'WHERE table_schema = DATABASE() AND table_name = %s',
+                [table],
+            )
+        else:
+            return None
+        row = cursor.fetchone()
+    # PostgreSQL reports -1 for tables that were never analyzed
+    if row is None or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator that takes the count of an unfiltered changelist from the
+    database statistics instead of a COUNT(*) over the whole table.
+    Filtered querysets and small tables are counted exactly.
+    """
+
+    exact_count_below = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if isinstance(queryset, models.QuerySet) and not queryset.query.where:
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= self.exact_count_below:
+                return estimate
+        return super().count
+
+
+class UrlPermissionChangeListMixin:
+    """
+    Changelist settings for tables with millions of permissions: no
+    per-row group queries, no extra COUNT(*), index-friendly search and
+    ordering, and bulk actions that run a single UPDATE.
+
+    The storage that URL_PERMISSION_STORAGE doesn't select is read-only,
+    since changes there have no effect.
+    """
+
+    list_select_related = ('group',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    # Prefix search on url and exact group names, see get_search_results
+    search_fields = ('^url', '=group__name')
+    actions = ('activate_permissions', 'deactivate_permissions')
+
+    def is_active_storage(self):
+        return get_permission_model() is self.model
+
+    def has_add_permission(self, request):
+        return self.is_active_storage() and super().has_add_permission(request)
+
+    def has_change_permission(self, request, obj=None):
+        return self.is_active_storage() and super().has_change_permission(request, obj)
+
+    def has_delete_permission(self, request, obj=None):
+        return self.is_active_storage() and super().has_delete_permission(request, obj)
+
+    def get_search_results(self, request, queryset, search_term):
+        """
+        Match URLs by case-sensitive prefix and groups by exact name, so
+        the lookups can use the url and group name indexes.
+        """
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        url = term[1:] if term.startswith('/') else term
+        return queryset.filter(models.Q(url__startswith=url) | models.Q(group__name=term)), False
+
+    def set_active(self, request, queryset, is_active):
+        updated = queryset.update(is_active=is_active, updated_at=timezone.now())
+        if updated:
+            # update() doesn't send post_save
+            notify_url_permissions_changed()
+        self.message_user(request, ngettext(
+            '%(count)d URL permission was updated.',
+            '%(count)d URL permissions were updated.',
+            updated,
+        ) % {'count': updated})
+
+    @admin.action(description=_('Activate selected URL permissions'), permissions=['change'])
+    def activate_permissions(self, request, queryset):
+        self.set_active(request, queryset, True)
+
+    @admin.action(description=_('Deactivate selected URL permissions'), permissions=['change'])
+    def deactivate_permissions(self, request, queryset):
+        self.set_active(request, queryset, False)
+
+
 # Unregister the default GroupAdmin
 admin.site.unregister(Group)
 # Register the custom GroupAdmin
@@ -154,11 +349,11 @@ admin.site.register(Group, CustomGroupAdmin)
 
 
 @admin.register(GroupUrlPermissions)
-class GroupUrlPermissionsAdmin(admin.ModelAdmin):
+class GroupUrlPermissionsAdmin(UrlPermissionChangeListMixin, admin.ModelAdmin):
     list_display = ('group', 'url', 'http_method', 'is_active', 'created_at')
     list_filter = ('group', 'http_method', 'is_active')
-    search_fields = ('group__name', 'url', 'description')
-    ordering = ('group__name', 'url')
+    # Follows url_perm_lookup_idx, ordering by group name would sort the table
+    ordering = ('url', 'group', 'http_method')
     readonly_fields = ('created_at', 'updated_at')
     
     fieldsets = (
@@ -175,14 +370,72 @@ class GroupUrlPermissionsAdmin(admin.ModelAdmin):
     )
 
 
+class GroupUrlPermissionMaskForm(forms.ModelForm):
+    http_methods = forms.MultipleChoiceField(
+        choices=GroupUrlPermissions.HTTP_METHODS,
+        widget=forms.CheckboxSelectMultiple,
+        label=_('HTTP methods'),
+    )
 
+    class Meta:
+        model = GroupUrlPermissionMask
+        fields = ('group', 'url', 'is_active', 'description')
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.initial['http_methods'] = bits_to_methods(self.instance.methods)
 
+    def save(self, commit=True):
+        self.instance.methods = methods_to_bits(self.cleaned_data['http_methods'])
+        return super().save(commit)
+
+
+@admin.register(GroupUrlPermissionMask)
+class GroupUrlPermissionMaskAdmin(UrlPermissionChangeListMixin, admin.ModelAdmin):
+    form = GroupUrlPermissionMaskForm
+    list_display = ('group', 'url', 'http_methods', 'is_active', 'created_at')
+    list_filter = ('group', 'is_active')
+    ordering = ('url', 'group')
+    readonly_fields = ('created_at', 'updated_at')
+
+    fieldsets = (
+        (None, {
+            'fields': ('group', 'url', 'http_methods')
+        }),
+        (_('Options'), {
+            'fields': ('is_active', 'description')
+        }),
+        (_('Timestamps'), {
+            'fields': ('created_at', 'updated_at'),
+            'classes': ('collapse',)
+        }),
+    )
 
+    @admin.display(description=_('HTTP methods'))
+    def http_methods(self, obj):
+        return ', '.join(obj.http_methods)
 
 
+@admin.register(UrlRoute)
+class UrlRouteAdmin(admin.ModelAdmin):
+    list_display = ('route', 'is_stale')
+    list_filter = ('is_stale',)
+    search_fields = ('route',)
+    readonly_fields = ('route',)
 
+    def has_add_permission(self, request):
+        return False
 
 
+@admin.register(UrlPermissionAuditLog)
+class UrlPermissionAuditLogAdmin(admin.ModelAdmin):
+    list_display = ('created_at', 'outcome', 'username', 'http_method', 'path', 'route')
+    list_filter = ('outcome', 'http_method')
+    search_fields = ('username', 'path')
+    date_hierarchy = 'created_at'
 
+    def has_add_permission(self, request):
+        return False
 
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -10,6 +10,7 @@
 # intellectual property rights and may result in legal action.
 
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class DjangoUrlPermissionsConfig(AppConfig):
@@ -18,7 +19,11 @@ class DjangoUrlPermissionsConfig(AppConfig):
 
     def ready(self):
         #add here setup for entire app. Executes only once in runserver
-        pass      
+        # Connect the receivers that keep in-process permission data fresh.
+        from . import cache, claims, signals, snapshot  # noqa: F401
+        from .routes import sync_routes_after_migrate
+
+        post_migrate.connect(sync_routes_after_migrate, sender=self)
         
 
 
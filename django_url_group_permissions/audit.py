@@ -0,0 +1,178 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import atexit
+import logging
+import os
+import queue
+import random
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .instrumentation import ALLOW, DENY
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class AuditLogger:
+    """
+    Writes permission decisions to UrlPermissionAuditLog off the request path.
+
+    Requests put records on a bounded queue; a daemon thread drains it in
+    batches with bulk_create. When the queue is full, records are dropped
+    and counted in `dropped` rather than slowing requests down.
+    """
+
+    def __init__(self, queue_size=10000, batch_size=500, flush_interval=1.0):
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self.written = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def record(self, record):
+        """Queue a record without blocking; drop it if the queue is full."""
+        self._ensure_thread()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_thread(self):
+        # Threads don't survive a fork, so start one per process
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._thread = threading.Thread(
+                target=self._run, name='url-permission-audit', daemon=True,
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            batch = []
+            try:
+                item = self.queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            stop = item is _STOP
+            if not stop:
+                batch.append(item)
+            while not stop and len(batch) < self.batch_size:
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                else:
+                    batch.append(item)
+            if batch:
+                self.write(batch)
+            if stop:
+                return
+
+    def write(self, records):
+        from .models.models import UrlPermissionAuditLog
+
+        try:
+            UrlPermissionAuditLog.objects.bulk_create(
+                [UrlPermissionAuditLog(**record) for record in records],
+                batch_size=self.batch_size,
+            )
+            self.written += len(records)
+        except Exception:
+            logger.exception('Could not write %d URL permission audit records', len(records))
+        finally:
+            close_old_connections()
+
+    def flush(self, timeout=5.0):
+        """Write everything still queued and stop the writer thread."""
+        thread = self._thread
+        if thread is None or not thread.is_alive() or self._pid != os.getpid():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        thread.join(timeout)
+        self._pid = None
+
+
+_audit_logger = None
+_audit_logger_lock = threading.Lock()
+
+
+def get_audit_logger():
+    global _audit_logger
+    if _audit_logger is None:
+        with _audit_logger_lock:
+            if _audit_logger is None:
+                _audit_logger = AuditLogger(
+                    queue_size=getattr(settings, 'URL_PERMISSION_AUDIT_QUEUE_SIZE', 10000),
+                    batch_size=getattr(settings, 'URL_PERMISSION_AUDIT_BATCH_SIZE', 500),
+                    flush_interval=getattr(settings, 'URL_PERMISSION_AUDIT_FLUSH_INTERVAL', 1.0),
+                )
+                atexit.register(_audit_logger.flush)
+    return _audit_logger
+
+
+def audit_hook(request, decision):
+    """
+    Instrumentation hook that audits every denied decision and a sample of
+    the allowed ones (URL_PERMISSION_AUDIT_SAMPLE_RATE).
+    """
+    if decision.outcome == ALLOW:
+        sample_rate = getattr(settings, 'URL_PERMISSION_AUDIT_SAMPLE_RATE', 0.0)
+        if not sample_rate or random.random() >= sample_rate:
+            return
+    elif decision.outcome != DENY:
+        return
+
+    user = decision.user
+    get_audit_logger().record({
+        'user_id': getattr(user, 'pk', None),
+        'username': user.get_username()[:150] if user is not None else '',
+        # Cut to the column sizes: one oversized value would fail the
+        # whole batch on databases that enforce them
+        'path': decision.path[:2048],
+        'route': (decision.route if decision.route != '-' else '')[:255],
+        'http_method': decision.method[:10],
+        'outcome': decision.outcome,
+        'created_at': timezone.now(),
+    })
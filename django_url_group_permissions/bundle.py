@@ -0,0 +1,223 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .matching import UrlMatcher, is_pattern
+from .models.models import HTTP_METHOD_BITS
+
+# File layout, all little-endian:
+#   header   magic, format version, flags, rules version, created at,
+#            url count, grant count, index/strings/grants offsets
+#   index    one (string offset, string length, first grant, grant count)
+#            per URL, sorted by the URL's UTF-8 bytes
+#   strings  the URLs
+#   grants   one (group id, method bits) per URL and group
+MAGIC = b'UGPB'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<4sHHQQIIIII')
+INDEX_ENTRY = struct.Struct('<IIII')
+GRANT = struct.Struct('<IH')
+ALL_BIT = HTTP_METHOD_BITS['ALL']
+
+
+class BundleError(Exception):
+    pass
+
+
+def write_bundle(path, rows):
+    """
+    Compile (group_id, url, http_method) rows into a bundle at `path`.
+
+    The file is written next to `path` and renamed into place, so running
+    processes never read a half-written bundle. It gets the permissions of
+    a newly created file, so workers running as another user can read it.
+    Returns the rules version, a hash of the content.
+    """
+    urls = {}
+    for group_id, url, http_method in rows:
+        if url.startswith('/'):
+            url = url[1:]
+        groups = urls.setdefault(url.encode('utf-8'), {})
+        groups[group_id] = groups.get(group_id, 0) | HTTP_METHOD_BITS.get(http_method, 0)
+
+    index = bytearray()
+    strings = bytearray()
+    grants = bytearray()
+    grant_count = 0
+    for url in sorted(urls):
+        groups = urls[url]
+        index += INDEX_ENTRY.pack(len(strings), len(url), grant_count, len(groups))
+        strings += url
+        for group_id in sorted(groups):
+            grants += GRANT.pack(group_id, groups[group_id])
+        grant_count += len(groups)
+
+    body = bytes(index + strings + grants)
+    rules_version = int.from_bytes(hashlib.sha256(body).digest()[:8], 'little')
+    index_offset = HEADER.size
+    strings_offset = index_offset + len(index)
+    grants_offset = strings_offset + len(strings)
+    header = HEADER.pack(
+        MAGIC, FORMAT_VERSION, 0, rules_version, int(time.time()),
+        len(urls), grant_count, index_offset, strings_offset, grants_offset,
+    )
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.url-permissions-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(header)
+            f.write(body)
+        # mkstemp creates the file readable by its owner only
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return rules_version
+
+
+class PermissionBundle:
+    """
+    Read-only view of a compiled bundle.
+
+    The file is memory-mapped, so forked workers share its pages, and
+    exact URLs are looked up with a binary search over the mapped index.
+    Only the wildcard and route patterns are loaded into a UrlMatcher.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            # mmap can't map an empty file
+            if os.fstat(f.fileno()).st_size < HEADER.size:
+                raise BundleError(f'{path} is not a URL permission bundle.')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic, format_version, _flags, self.rules_version, self.created_at,
+            self.url_count, self.grant_count,
+            self._index_offset, self._strings_offset, self._grants_offset,
+        ) = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            raise BundleError(f'{path} is not a URL permission bundle.')
+        if format_version != FORMAT_VERSION:
+            raise BundleError(f'{path} has unsupported format version {format_version}.')
+        if (
+            self._index_offset + self.url_count * INDEX_ENTRY.size > self._strings_offset or
+            self._strings_offset > self._grants_offset or
+            self._grants_offset + self.grant_count * GRANT.size > len(self._mmap)
+        ):
+            raise BundleError(f'{path} is truncated or corrupt.')
+
+        self._patterns = UrlMatcher()
+        for position in range(self.url_count):
+            url = self._url(position)
+            if is_pattern(url.decode('utf-8')):
+                for group_id, bits in self._grants(position):
+                    self._patterns.add(url.decode('utf-8'), (group_id, bits))
+
+    def _entry(self, position):
+        return INDEX_ENTRY.unpack_from(self._mmap, self._index_offset + position * INDEX_ENTRY.size)
+
+    def _url(self, position):
+        offset, length, _, _ = self._entry(position)
+        start = self._strings_offset + offset
+        return self._mmap[start:start + length]
+
+    def _grants(self, position):
+        _, _, first, count = self._entry(position)
+        for grant in range(first, first + count):
+            yield GRANT.unpack_from(self._mmap, self._grants_offset + grant * GRANT.size)
+
+    def _find(self, url):
+        key = url.encode('utf-8')
+        low, high = 0, self.url_count
+        while low < high:
+            middle = (low + high) // 2
+            current = self._url(middle)
+            if current < key:
+                low = middle + 1
+            elif current > key:
+                high = middle
+            else:
+                return middle
+        return None
+
+    def has_url_permission(self, group_ids, url, method='GET'):
+        """
+        Check if any of the given groups may access the URL with given method.
+        """
+        if url.startswith('/'):
+            url = url[1:]
+
+        wanted = HTTP_METHOD_BITS.get(method.upper(), 0) | ALL_BIT
+        group_ids = set(group_ids)
+        position = self._find(url)
+        if position is not None:
+            for group_id, bits in self._grants(position):
+                if bits & wanted and group_id in group_ids:
+                    return True
+
+        if not self._patterns:
+            return False
+        return any(
+            bits & wanted and group_id in group_ids
+            for group_id, bits in self._patterns.match(url)
+        )
+
+    def close(self):
+        self._mmap.close()
+
+
+_lock = threading.Lock()
+_bundle = None
+
+
+def get_bundle():
+    """Return the bundle at URL_PERMISSION_BUNDLE_PATH, loaded once per process."""
+    global _bundle
+    if _bundle is None:
+        with _lock:
+            if _bundle is None:
+                path = getattr(settings, 'URL_PERMISSION_BUNDLE_PATH', None)
+                if not path:
+                    raise ImproperlyConfigured(
+                        "URL_PERMISSION_ENGINE = 'bundle' requires URL_PERMISSION_BUNDLE_PATH."
+                    )
+                _bundle = PermissionBundle(path)
+    return _bundle
@@ -0,0 +1,255 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed
+from django.dispatch import receiver
+
+from .matching import compile_keyed_rules, is_pattern, rules_key
+from .models.models import get_permission_model
+from .signals import url_permissions_changed
+
+KEY_PREFIX = 'url_permissions'
+VERSION_KEY = f'{KEY_PREFIX}:version'
+
+
+class UserPermissions(namedtuple(
+    'UserPermissions', ['pairs', 'patterns', 'patterns_key'], defaults=(None,),
+)):
+    """
+    A user's effective permissions: a frozenset of (url, method) pairs plus
+    the (pattern, method) pairs that need the URL matcher, and their
+    rules_key so the compiled matcher is found without hashing them.
+    """
+
+    __slots__ = ()
+
+    def allows(self, url, method='GET'):
+        if url.startswith('/'):
+            url = url[1:]
+
+        method = method.upper()
+        if (url, method) in self.pairs or (url, 'ALL') in self.pairs:
+            return True
+        if not self.patterns:
+            return False
+        # Entries cached before patterns_key existed don't have it
+        key = self.patterns_key or rules_key(self.patterns)
+        matched = compile_keyed_rules(key, lambda: self.patterns).match(url)
+        return method in matched or 'ALL' in matched
+
+
+class CacheStats:
+    """Thread-safe in-process counters for the permission cache."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def hit(self):
+        with self._lock:
+            self.hits += 1
+
+    def miss(self):
+        with self._lock:
+            self.misses += 1
+
+    def as_dict(self):
+        with self._lock:
+            hits, misses = self.hits, self.misses
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_ratio': hits / total if total else 0.0,
+        }
+
+    def reset(self):
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+cache_stats = CacheStats()
+
+
+def get_cache():
+    return caches[getattr(settings, 'URL_PERMISSION_CACHE', 'default')]
+
+
+def get_rules_version():
+    """Return the current rules version, creating it if it was evicted."""
+    cache = get_cache()
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so a lost version never reuses old keys.
+        cache.add(VERSION_KEY, time.time_ns() // 1000, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_rules_version():
+    """Invalidate every cached user permission set."""
+    cache = get_cache()
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        get_rules_version()
+
+
+def user_cache_key(user_id, version):
+    return f'{KEY_PREFIX}:user:{user_id}:{version}'
+
+
+def user_stamp_key(user_id):
+    return f'{KEY_PREFIX}:stamp:{user_id}'
+
+
+def get_user_stamp(user_id):
+    """
+    Return a value that changes whenever the user's groups change, used to
+    tell if permission claims issued to the user are still current.
+    """
+    cache = get_cache()
+    key = user_stamp_key(user_id)
+    stamp = cache.get(key)
+    if stamp is None:
+        cache.add(key, time.time_ns() // 1000, None)
+        stamp = cache.get(key)
+    return stamp
+
+
+def _user_permissions_queryset(user):
+    model = get_permission_model()
+    return model.objects.filter(
+        is_active=True,
+        **model._user_filter(user),
+    ).order_by().values_list(*model.grant_fields).distinct()
+
+
+def _build_user_permissions(pairs):
+    pairs = frozenset(pairs)
+    patterns = tuple(sorted(pair for pair in pairs if is_pattern(pair[0])))
+    return UserPermissions(pairs, patterns, rules_key(patterns))
+
+
+def _cache_timeout():
+    return getattr(settings, 'URL_PERMISSION_CACHE_TIMEOUT', 3600)
+
+
+def get_user_permissions(user):
+    """Return the user's effective permissions as UserPermissions."""
+    cache = get_cache()
+    key = user_cache_key(user.pk, get_rules_version())
+    permissions = cache.get(key)
+    if permissions is not None:
+        cache_stats.hit()
+        return permissions
+
+    cache_stats.miss()
+    permissions = _build_user_permissions(
+        get_permission_model().expand_grants(_user_permissions_queryset(user))
+    )
+    cache.set(key, permissions, _cache_timeout())
+    return permissions
+
+
+async def aget_rules_version():
+    """Async version of get_rules_version."""
+    cache = get_cache()
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        await cache.aadd(VERSION_KEY, time.time_ns() // 1000, None)
+        version = await cache.aget(VERSION_KEY)
+    return version
+
+
+async def aget_user_permissions(user):
+    """Async version of get_user_permissions."""
+    cache = get_cache()
+    key = user_cache_key(user.pk, await aget_rules_version())
+    permissions = await cache.aget(key)
+    if permissions is not None:
+        cache_stats.hit()
+        return permissions
+
+    cache_stats.miss()
+    permissions = _build_user_permissions(get_permission_model().expand_grants(
+        [row async for row in _user_permissions_queryset(user)]
+    ))
+    await cache.aset(key, permissions, _cache_timeout())
+    return permissions
+
+
+def invalidate_user_permissions(user_ids):
+    cache = get_cache()
+    version = get_rules_version()
+    cache.delete_many(
+        [user_cache_key(user_id, version) for user_id in user_ids] +
+        [user_stamp_key(user_id) for user_id in user_ids]
+    )
+
+
+def get_cache_stats():
+    """Return the cache hit/miss counters of this process."""
+    return cache_stats.as_dict()
+
+
+@receiver(url_permissions_changed)
+def invalidate_cache_on_change(sender, **kwargs):
+    bump_rules_version()
+
+
+def user_groups_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        user_ids = [instance.pk]
+    elif pk_set:
+        user_ids = list(pk_set)
+    else:
+        # group.user_set.clear() doesn't report which users were removed.
+        transaction.on_commit(bump_rules_version)
+        return
+    transaction.on_commit(lambda: invalidate_user_permissions(user_ids))
+
+
+User = get_user_model()
+if hasattr(User, 'groups'):
+    m2m_changed.connect(
+        user_groups_changed,
+        sender=User.groups.through,
+        dispatch_uid='url_permissions_user_groups_changed',
+    )
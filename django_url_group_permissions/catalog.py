@@ -0,0 +1,119 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import threading
+
+from django.conf import settings
+from django.urls import URLPattern, URLResolver, get_resolver
+
+from .models.models import GroupUrlPermissions
+
+
+def get_clean_url(url_path):
+    """Remove language prefix if present and clean the URL path."""
+    if hasattr(settings, 'LANGUAGES'):
+        for lang_code, _ in settings.LANGUAGES:
+            prefix = f'{lang_code}/'
+            if url_path.startswith(prefix):
+                return url_path[len(prefix):]
+    return url_path
+
+
+def iter_urls(patterns):
+    """
+    Yield the full route of every URLPattern below `patterns`, in URLconf
+    order. Uses an explicit stack, so deep or large URLconfs don't hit the
+    recursion limit.
+    """
+    stack = [(iter(patterns), '')]
+    while stack:
+        patterns, prefix = stack[-1]
+        pattern = next(patterns, None)
+        if pattern is None:
+            stack.pop()
+        elif isinstance(pattern, URLPattern):
+            yield prefix + str(pattern.pattern)
+        elif isinstance(pattern, URLResolver):
+            stack.append((iter(pattern.url_patterns), prefix + str(pattern.pattern)))
+
+
+class UrlCatalog:
+    """
+    Every URL of the URLconf (without language prefix) combined with every
+    HTTP method, with the 'url|method' ids used by the group admin.
+    """
+
+    def __init__(self, urls):
+        methods = [method for method, _ in GroupUrlPermissions.HTTP_METHODS]
+        self.urls = tuple(dict.fromkeys(get_clean_url(url) for url in urls))
+        self.entries = tuple(
+            {
+                'id': f'{url}|{method}',
+                'url': url,
+                'http_method': method,
+            }
+            for url in self.urls
+            for method in methods
+        )
+        self._search_texts = tuple(
+            f"{entry['url']} | {entry['http_method']}".lower() for entry in self.entries
+        )
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, term=''):
+        """Yield the entries containing every word of `term`."""
+        words = term.lower().split()
+        for entry, text in zip(self.entries, self._search_texts):
+            if all(word in text for word in words):
+                yield entry
+
+
+_lock = threading.Lock()
+_cached = None
+
+
+def get_url_catalog():
+    """
+    Return the URL catalog of the current URLconf.
+
+    The catalog is built once per process and rebuilt when the resolver
+    changes, e.g. after clear_url_caches() or a ROOT_URLCONF change.
+    """
+    global _cached
+    resolver = get_resolver()
+    cached = _cached
+    if cached is not None and cached[0] is resolver:
+        return cached[1]
+
+    with _lock:
+        cached = _cached
+        if cached is not None and cached[0] is resolver:
+            return cached[1]
+        catalog = UrlCatalog(iter_urls(resolver.url_patterns))
+        _cached = (resolver, catalog)
+        return catalog
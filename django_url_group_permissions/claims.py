@@ -0,0 +1,204 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out
+from django.core import signing
+from django.dispatch import receiver
+
+from .cache import (
+    VERSION_KEY, get_cache, get_rules_version, get_user_permissions, get_user_stamp, user_stamp_key,
+)
+from .matching import compile_keyed_rules, is_pattern, rules_key
+from .models.models import HTTP_METHOD_BITS, methods_to_bits
+
+SALT = 'django_url_group_permissions.claims'
+ALL_BIT = HTTP_METHOD_BITS['ALL']
+
+
+def get_claims_settings():
+    return {
+        'header': getattr(settings, 'URL_PERMISSION_CLAIMS_HEADER', 'X-Url-Permissions'),
+        'cookie': getattr(settings, 'URL_PERMISSION_CLAIMS_COOKIE', 'url_permissions'),
+        'max_age': getattr(settings, 'URL_PERMISSION_CLAIMS_MAX_AGE', 3600),
+    }
+
+
+class PermissionClaims:
+    """
+    The verified content of a claims token: the user id, the rules version
+    and user stamp it was issued for, and the allowed methods per URL.
+    """
+
+    __slots__ = ('user_id', 'rules_version', 'stamp', '_methods', '_patterns_key')
+
+    def __init__(self, payload):
+        self.user_id = payload['u']
+        self.rules_version = payload['v']
+        self.stamp = payload['s']
+        self._methods = dict(payload['p'])
+        # The rules_key of the patterns, None if there are none
+        if 'k' in payload:
+            self._patterns_key = payload['k']
+        else:
+            self._patterns_key = pattern_rules_key(self._pattern_rules())
+
+    def _pattern_rules(self):
+        return sorted((url, bits) for url, bits in self._methods.items() if is_pattern(url))
+
+    def allows(self, url, method='GET'):
+        if url.startswith('/'):
+            url = url[1:]
+
+        wanted = HTTP_METHOD_BITS.get(method.upper(), 0) | ALL_BIT
+        if self._methods.get(url, 0) & wanted:
+            return True
+        if self._patterns_key is None:
+            return False
+        matcher = compile_keyed_rules(self._patterns_key, self._pattern_rules)
+        return any(bits & wanted for bits in matcher.match(url))
+
+
+def pattern_rules_key(patterns):
+    return rules_key(patterns) if patterns else None
+
+
+def issue_claims(user):
+    """
+    Return a signed, compressed token of the user's effective permissions,
+    stamped with the current rules version and the user's stamp.
+    """
+    # Read the stamps first: a change made while the permissions are
+    # loaded bumps them, and the token is stale from the start.
+    rules_version = get_rules_version()
+    stamp = get_user_stamp(user.pk)
+    methods = {}
+    for url, method in get_user_permissions(user).pairs:
+        methods[url] = methods.get(url, 0) | methods_to_bits([method])
+    patterns = sorted((url, bits) for url, bits in methods.items() if is_pattern(url))
+    return signing.dumps(
+        {
+            'u': user.pk, 'v': rules_version, 's': stamp, 'p': sorted(methods.items()),
+            'k': pattern_rules_key(patterns),
+        },
+        salt=SALT,
+        compress=True,
+    )
+
+
+def get_token(request):
+    claims_settings = get_claims_settings()
+    return (
+        request.headers.get(claims_settings['header']) or
+        request.COOKIES.get(claims_settings['cookie'])
+    )
+
+
+def load_claims(token, user):
+    """Return the token's PermissionClaims for the user, or None if it is invalid."""
+    try:
+        payload = signing.loads(token, salt=SALT, max_age=get_claims_settings()['max_age'])
+    except signing.BadSignature:
+        return None
+    if payload.get('u') != user.pk:
+        return None
+    return PermissionClaims(payload)
+
+
+def is_current(claims, values):
+    return (
+        values.get(VERSION_KEY) == claims.rules_version and
+        values.get(user_stamp_key(claims.user_id)) == claims.stamp
+    )
+
+
+def read_claims(request, user):
+    """
+    Return the PermissionClaims sent with the request, or None when they are
+    missing, invalid, expired or issued before the last permission or group
+    change. Checking costs one cache round trip and no query.
+    """
+    token = get_token(request)
+    if not token:
+        return None
+    claims = load_claims(token, user)
+    if claims is None:
+        return None
+    values = get_cache().get_many([VERSION_KEY, user_stamp_key(user.pk)])
+    return claims if is_current(claims, values) else None
+
+
+async def aread_claims(request, user):
+    """Async version of read_claims."""
+    token = get_token(request)
+    if not token:
+        return None
+    claims = load_claims(token, user)
+    if claims is None:
+        return None
+    values = await get_cache().aget_many([VERSION_KEY, user_stamp_key(user.pk)])
+    return claims if is_current(claims, values) else None
+
+
+async def aissue_claims(user):
+    """Async version of issue_claims."""
+    return await sync_to_async(issue_claims)(user)
+
+
+def set_claims_cookie(response, token):
+    """
+    Send the token in the claims header and, if it fits, the claims cookie.
+    An empty token deletes the cookie.
+    """
+    claims_settings = get_claims_settings()
+    if not token:
+        response.delete_cookie(claims_settings['cookie'], samesite=settings.SESSION_COOKIE_SAMESITE)
+        return
+    response[claims_settings['header']] = token
+    # Browsers drop cookies over 4 KB; clients can still echo the header
+    if len(token) < 4000:
+        response.set_cookie(
+            claims_settings['cookie'],
+            token,
+            max_age=claims_settings['max_age'],
+            secure=settings.SESSION_COOKIE_SECURE,
+            httponly=True,
+            samesite=settings.SESSION_COOKIE_SAMESITE,
+        )
+
+
+@receiver(user_logged_in, dispatch_uid='url_permissions_issue_claims')
+def issue_claims_on_login(sender, request, user, **kwargs):
+    if request is not None and getattr(settings, 'URL_PERMISSION_CLAIMS', False):
+        # The middleware sends it with the response
+        request.url_permission_claims = issue_claims(user)
+
+
+@receiver(user_logged_out, dispatch_uid='url_permissions_clear_claims')
+def clear_claims_on_logout(sender, request, user, **kwargs):
+    if request is not None and getattr(settings, 'URL_PERMISSION_CLAIMS', False):
+        request.url_permission_claims = ''
@@ -0,0 +1,199 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .bundle import get_bundle
+from .cache import _build_user_permissions, _user_permissions_queryset, aget_user_permissions, get_user_permissions
+from .models.models import get_permission_model
+from .snapshot import aget_snapshot, get_snapshot
+
+
+class GroupPermissions(namedtuple('GroupPermissions', ['index', 'group_ids'])):
+    """The permissions of a set of groups in a snapshot or bundle."""
+
+    __slots__ = ()
+
+    def allows(self, url, method='GET'):
+        return self.index.has_url_permission(self.group_ids, url, method)
+
+
+def _group_ids(user, group_ids):
+    if group_ids is None:
+        group_ids = list(user.groups.values_list('id', flat=True))
+    return group_ids
+
+
+class DatabaseEngine:
+    """Answer permission checks with a query per request."""
+
+    # Whether get_user_permissions uses the user's group ids
+    needs_group_ids = False
+
+    def get_user_permissions(self, user, group_ids=None):
+        """
+        Return the user's permissions, loaded with one query, for answering
+        many checks from memory. Each engine returns an object with an
+        allows(url, method) method.
+        """
+        model = get_permission_model()
+        return _build_user_permissions(model.expand_grants(_user_permissions_queryset(user)))
+
+    def has_url_permission(self, user, url, method='GET'):
+        return self.has_any_url_permission(user, [url], method)
+
+    async def ahas_url_permission(self, user, url, method='GET'):
+        return await self.ahas_any_url_permission(user, [url], method)
+
+    def has_any_url_permission(self, user, urls, method='GET'):
+        """Check if the user may access any of the URLs, with one query."""
+        return get_permission_model().has_any_url_permission(
+            user=user, urls=urls, method=method,
+        )
+
+    async def ahas_any_url_permission(self, user, urls, method='GET'):
+        return await get_permission_model().ahas_any_url_permission(
+            user=user, urls=urls, method=method,
+        )
+
+
+class SnapshotEngine:
+    """Answer permission checks from the in-process permission snapshot."""
+
+    needs_group_ids = True
+
+    def get_user_permissions(self, user, group_ids=None):
+        return GroupPermissions(get_snapshot(), _group_ids(user, group_ids))
+
+    def has_url_permission(self, user, url, method='GET'):
+        return self.has_any_url_permission(user, [url], method)
+
+    async def ahas_url_permission(self, user, url, method='GET'):
+        return await self.ahas_any_url_permission(user, [url], method)
+
+    def has_any_url_permission(self, user, urls, method='GET'):
+        if user.is_superuser:
+            return True
+
+        group_ids = list(user.groups.values_list('id', flat=True))
+        snapshot = get_snapshot()
+        return any(snapshot.has_url_permission(group_ids, url, method) for url in urls)
+
+    async def ahas_any_url_permission(self, user, urls, method='GET'):
+        if user.is_superuser:
+            return True
+
+        group_ids = [group_id async for group_id in user.groups.values_list('id', flat=True)]
+        snapshot = await aget_snapshot()
+        return any(snapshot.has_url_permission(group_ids, url, method) for url in urls)
+
+
+class CacheEngine:
+    """Answer permission checks from each user's cached effective permissions."""
+
+    needs_group_ids = False
+
+    def get_user_permissions(self, user, group_ids=None):
+        return get_user_permissions(user)
+
+    def has_url_permission(self, user, url, method='GET'):
+        return self.has_any_url_permission(user, [url], method)
+
+    async def ahas_url_permission(self, user, url, method='GET'):
+        return await self.ahas_any_url_permission(user, [url], method)
+
+    def has_any_url_permission(self, user, urls, method='GET'):
+        if user.is_superuser:
+            return True
+
+        permissions = get_user_permissions(user)
+        return any(permissions.allows(url, method) for url in urls)
+
+    async def ahas_any_url_permission(self, user, urls, method='GET'):
+        if user.is_superuser:
+            return True
+
+        permissions = await aget_user_permissions(user)
+        return any(permissions.allows(url, method) for url in urls)
+
+
+class BundleEngine:
+    """
+    Answer permission checks from a precompiled bundle file, without
+    querying the permission table. The bundle is loaded when the engine
+    is created, i.e. when the middleware starts.
+    """
+
+    needs_group_ids = True
+
+    def __init__(self):
+        self.bundle = get_bundle()
+
+    def get_user_permissions(self, user, group_ids=None):
+        return GroupPermissions(self.bundle, _group_ids(user, group_ids))
+
+    def has_url_permission(self, user, url, method='GET'):
+        return self.has_any_url_permission(user, [url], method)
+
+    async def ahas_url_permission(self, user, url, method='GET'):
+        return await self.ahas_any_url_permission(user, [url], method)
+
+    def has_any_url_permission(self, user, urls, method='GET'):
+        if user.is_superuser:
+            return True
+
+        group_ids = list(user.groups.values_list('id', flat=True))
+        return any(self.bundle.has_url_permission(group_ids, url, method) for url in urls)
+
+    async def ahas_any_url_permission(self, user, urls, method='GET'):
+        if user.is_superuser:
+            return True
+
+        group_ids = [group_id async for group_id in user.groups.values_list('id', flat=True)]
+        return any(self.bundle.has_url_permission(group_ids, url, method) for url in urls)
+
+
+ENGINES = {
+    'database': DatabaseEngine,
+    'snapshot': SnapshotEngine,
+    'cache': CacheEngine,
+    'bundle': BundleEngine,
+}
+
+
+def get_engine(name=None):
+    """Return an instance of the configured permission engine."""
+    if name is None:
+        name = getattr(settings, 'URL_PERMISSION_ENGINE', 'database')
+    try:
+        return ENGINES[name]()
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"URL_PERMISSION_ENGINE must be one of {', '.join(ENGINES)}, got {name!r}."
+        )
@@ -0,0 +1,263 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Outcomes of a permission decision
+ALLOW = 'allow'
+DENY = 'deny'
+EXEMPT = 'exempt'
+SKIP = 'skip'
+
+
+class Counter:
+    """Thread-safe counter with label values."""
+
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = defaultdict(int)
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] += amount
+
+    def values(self):
+        with self._lock:
+            return dict(self._values)
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """Thread-safe histogram with cumulative buckets and label values."""
+
+    def __init__(self, name, buckets, labels=()):
+        self.name = name
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def observe(self, value, *label_values):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(label_values)
+            if series is None:
+                series = self._values[label_values] = {
+                    'buckets': [0] * len(self.buckets), 'sum': 0, 'count': 0,
+                }
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def values(self):
+        """Return {label values: {'buckets': {upper bound: cumulative count}, 'sum', 'count'}}."""
+        with self._lock:
+            result = {}
+            for label_values, series in self._values.items():
+                cumulative = 0
+                buckets = {}
+                for bound, count in zip(self.buckets, series['buckets']):
+                    cumulative += count
+                    buckets[bound] = cumulative
+                result[label_values] = {'buckets': buckets, 'sum': series['sum'], 'count': series['count']}
+            return result
+
+    def reset(self):
+        with self._lock:
+            self._values.clear()
+
+
+decisions_total = Counter('url_permission_decisions_total', labels=('outcome', 'route'))
+decision_seconds = Histogram(
+    'url_permission_decision_seconds',
+    buckets=(0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25),
+    labels=('route',),
+)
+decision_queries = Histogram(
+    'url_permission_decision_queries',
+    buckets=(0, 1, 2, 3, 5, 10),
+    labels=('route',),
+)
+METRICS = (decisions_total, decision_seconds, decision_queries)
+
+
+def get_metrics():
+    """Return the in-process metrics keyed by metric name."""
+    return {metric.name: metric.values() for metric in METRICS}
+
+
+def reset_metrics():
+    for metric in METRICS:
+        metric.reset()
+
+
+def record_metrics(request, decision):
+    """Instrumentation hook that feeds the in-process metrics."""
+    decisions_total.inc(decision.outcome, decision.route)
+    decision_seconds.observe(decision.duration, decision.route)
+    if decision.queries is not None:
+        decision_queries.observe(decision.queries, decision.route)
+
+
+class Decision:
+    """
+    One permission decision as seen by the instrumentation hooks.
+
+    `phases` maps each phase the decision went through ('path', 'user',
+    'resolve', 'permission') to its duration in seconds. `queries` is the
+    number of queries on the default database, or None when unknown
+    (async requests).
+    """
+
+    __slots__ = ('outcome', 'route', 'method', 'path', 'user', 'phases', 'duration', 'queries')
+
+    def __init__(self, outcome, route, method, path, user, phases, duration, queries):
+        self.outcome = outcome
+        self.route = route
+        self.method = method
+        self.path = path
+        self.user = user
+        self.phases = phases
+        self.duration = duration
+        self.queries = queries
+
+    def server_timing(self):
+        """Return the value of a Server-Timing header for this decision."""
+        return ', '.join(
+            f'urlperm-{phase};dur={seconds * 1000:.3f}' for phase, seconds in self.phases.items()
+        )
+
+
+class NullTracker:
+    """Tracker used when instrumentation is off; does nothing."""
+
+    __slots__ = ()
+
+    def mark(self, phase):
+        pass
+
+    def set_route(self, route):
+        pass
+
+    def set_user(self, user):
+        pass
+
+    def stop(self):
+        pass
+
+    def finish(self, outcome, response=None):
+        return response
+
+
+NULL_TRACKER = NullTracker()
+
+
+class Tracker:
+    """Times the phases of one decision and reports it to the hooks."""
+
+    def __init__(self, request, path, hooks, count_queries=True):
+        self.request = request
+        self.path = path
+        self.hooks = hooks
+        self.route = '-'
+        self.user = None
+        self.phases = {}
+        self.queries = 0 if count_queries else None
+        self.count_queries = count_queries
+        if count_queries:
+            connection.execute_wrappers.append(self._count_query)
+        self.start = self.last = time.perf_counter()
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0) + now - self.last
+        self.last = now
+
+    def set_route(self, route):
+        self.route = route or '-'
+
+    def set_user(self, user):
+        self.user = user
+
+    def stop(self):
+        if self.count_queries:
+            self.count_queries = False
+            try:
+                connection.execute_wrappers.remove(self._count_query)
+            except ValueError:
+                pass
+
+    def finish(self, outcome, response=None):
+        self.stop()
+        decision = Decision(
+            outcome=outcome,
+            route=self.route,
+            method=self.request.method,
+            path=self.path,
+            user=self.user,
+            phases=self.phases,
+            duration=time.perf_counter() - self.start,
+            queries=self.queries,
+        )
+        self.request.url_permission_decision = decision
+        for hook in self.hooks:
+            try:
+                hook(self.request, decision)
+            except Exception:
+                logger.exception('URL permission instrumentation hook %r failed', hook)
+        return response
+
+
+def get_hooks():
+    """Return the configured instrumentation hooks."""
+    hooks = []
+    if getattr(settings, 'URL_PERMISSION_INSTRUMENTATION', False):
+        hooks.append(record_metrics)
+    if getattr(settings, 'URL_PERMISSION_AUDIT', False):
+        from .audit import audit_hook
+        hooks.append(audit_hook)
+    for hook in getattr(settings, 'URL_PERMISSION_INSTRUMENTATION_HOOKS', []):
+        hooks.append(import_string(hook) if isinstance(hook, str) else hook)
+    return hooks
@@ -0,0 +1,118 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+"""Reading and writing GroupUrlPermissions as JSON Lines or CSV."""
+
+import csv
+import json
+
+from django.core.management.base import CommandError
+
+from ...models import GroupUrlPermissions
+
+FIELDS = ('group', 'url', 'http_method', 'is_active', 'description')
+FORMATS = ('jsonl', 'csv')
+HTTP_METHODS = tuple(method for method, _ in GroupUrlPermissions.HTTP_METHODS)
+
+
+def guess_format(path, default='jsonl'):
+    if path and path.endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def open_file(path, mode, default):
+    """Open `path`, or return `default` when path is '-'."""
+    if path in (None, '-'):
+        return default
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+def parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in ('1', 'true', 'yes', 'y')
+
+
+class RecordWriter:
+    def __init__(self, stream, file_format):
+        self.stream = stream
+        self.format = file_format
+        if file_format == 'csv':
+            self.writer = csv.writer(stream)
+            self.writer.writerow(FIELDS)
+
+    def write(self, record):
+        if self.format == 'csv':
+            self.writer.writerow(['' if value is None else value for value in record])
+        else:
+            self.stream.write(json.dumps(dict(zip(FIELDS, record))) + '\n')
+
+
+def read_rows(stream, file_format):
+    """Yield (line number, row dict) without loading the whole file."""
+    if file_format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+        return
+
+    for line_number, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield line_number, json.loads(line)
+        except ValueError as e:
+            raise CommandError(f'Invalid JSON on line {line_number}: {e}')
+
+
+def read_records(stream, file_format):
+    """
+    Yield one dict per record without loading the whole file. URLs are
+    stored without a leading slash and methods in upper case, like the
+    admin stores them; unknown methods are rejected.
+    """
+    for line_number, row in read_rows(stream, file_format):
+        try:
+            url = row['url'].strip()
+            http_method = (row.get('http_method') or 'GET').strip().upper()
+            record = {
+                'group': row['group'],
+                'url': url[1:] if url.startswith('/') else url,
+                'http_method': http_method,
+                'is_active': parse_bool(row.get('is_active', True)),
+                'description': row.get('description') or None,
+            }
+        except (KeyError, TypeError, AttributeError) as e:
+            raise CommandError(f'Invalid record on line {line_number}: {e}')
+        if not record['url']:
+            raise CommandError(f'Invalid record on line {line_number}: empty url')
+        if http_method not in HTTP_METHODS:
+            raise CommandError(
+                f"Invalid record on line {line_number}: unknown HTTP method {row['http_method']!r}, "
+                f"expected one of {', '.join(HTTP_METHODS)}"
+            )
+        yield record
@@ -0,0 +1,43 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from django.core.management.base import BaseCommand
+
+from ...bundle import write_bundle
+from ...models import get_permission_model
+
+
+class Command(BaseCommand):
+    help = 'Compile the active URL permissions into a binary bundle for the bundle engine.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Path of the bundle file, usually URL_PERMISSION_BUNDLE_PATH.')
+        parser.add_argument('--chunk-size', type=int, default=5000, help='Rows fetched per database round trip.')
+
+    def handle(self, *args, **options):
+        rows = get_permission_model().active_grants(chunk_size=options['chunk_size'])
+        rules_version = write_bundle(options['output'], rows)
+        self.stdout.write(f"Wrote {options['output']} (rules version {rules_version:016x}).")
@@ -0,0 +1,93 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from django.core.management.base import BaseCommand
+from django.db import connections, router, transaction
+
+from ...models import STORAGES, GroupUrlPermissionMask, GroupUrlPermissions, bits_to_methods, collapse_grants
+from ...signals import notify_url_permissions_changed
+
+
+class Command(BaseCommand):
+    help = (
+        'Rebuild the permissions of one URL_PERMISSION_STORAGE from the other, '
+        'before switching the setting.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('storage', choices=STORAGES, help='The storage to rebuild.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Rows written per query.')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        target = STORAGES[options['storage']]
+        if target is GroupUrlPermissionMask:
+            permissions = self.collapse()
+        else:
+            permissions = self.expand()
+
+        connection = connections[router.db_for_write(target)]
+        with transaction.atomic(using=connection.alias):
+            # A plain DELETE: the ORM would load every row to send
+            # post_delete, and the receivers only need one notification
+            with connection.cursor() as cursor:
+                cursor.execute(f'DELETE FROM {connection.ops.quote_name(target._meta.db_table)}')
+            target.objects.bulk_create(permissions, batch_size=batch_size)
+            notify_url_permissions_changed()
+        self.stdout.write(f"Wrote {len(permissions)} {target._meta.verbose_name_plural}.")
+
+    def collapse(self):
+        """One bitmask row per group and URL."""
+        rows = GroupUrlPermissions.objects.order_by().values_list(
+            'group_id', 'url', 'http_method', 'is_active', 'description',
+        ).iterator()
+        return [
+            GroupUrlPermissionMask(
+                group_id=group_id,
+                url=url,
+                methods=methods,
+                is_active=is_active,
+                description=description,
+            )
+            for group_id, url, methods, is_active, description in collapse_grants(rows)
+        ]
+
+    def expand(self):
+        """One row per group, URL and method."""
+        rows = GroupUrlPermissionMask.objects.order_by().values_list(
+            'group_id', 'url', 'methods', 'is_active', 'description',
+        ).iterator()
+        return [
+            GroupUrlPermissions(
+                group_id=group_id,
+                url=url,
+                http_method=http_method,
+                is_active=is_active,
+                description=description,
+            )
+            for group_id, url, methods, is_active, description in rows
+            for http_method in bits_to_methods(methods)
+        ]
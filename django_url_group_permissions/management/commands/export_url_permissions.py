@@ -0,0 +1,66 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from django.core.management.base import BaseCommand
+
+from ...models import get_permission_model
+from ._formats import FORMATS, RecordWriter, guess_format, open_file
+
+
+class Command(BaseCommand):
+    help = 'Export URL permissions as JSON Lines or CSV, streaming from the database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help="Output file, '-' for stdout (default).")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to csv for .csv files, jsonl otherwise.')
+        parser.add_argument('--group', action='append', dest='groups', help='Only export this group (repeatable).')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip.')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or guess_format(options['output'])
+        model = get_permission_model()
+        queryset = model.objects.order_by('group__name', *model.grant_fields)
+        if options['groups']:
+            queryset = queryset.filter(group__name__in=options['groups'])
+        rows = queryset.values_list(
+            'group__name', *model.grant_fields, 'is_active', 'description',
+        ).iterator(chunk_size=options['chunk_size'])
+
+        stream = open_file(options['output'], 'w', self.stdout)
+        count = 0
+        try:
+            writer = RecordWriter(stream, file_format)
+            for group, url, grant, is_active, description in rows:
+                # One record per method, whatever the storage
+                for url, http_method in model.expand_grants([(url, grant)]):
+                    writer.write((group, url, http_method, is_active, description))
+                    count += 1
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        if options['output'] != '-':
+            self.stdout.write(f'Exported {count} URL permissions to {options["output"]}.')
@@ -0,0 +1,202 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import sys
+from itertools import islice
+
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from ...models import GroupUrlPermissionMask, bits_to_methods, collapse_grants, get_permission_model
+from ...signals import notify_url_permissions_changed
+from ._formats import FORMATS, guess_format, open_file, read_records
+
+UPDATE_FIELDS = ('is_active', 'description')
+
+
+class DryRun(Exception):
+    """Raised to roll back a dry run."""
+
+
+class Command(BaseCommand):
+    help = (
+        'Import URL permissions from JSON Lines or CSV, applying only the '
+        'differences with the database. Groups are matched by name.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('input', nargs='?', default='-', help="Input file, '-' for stdin (default).")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to csv for .csv files, jsonl otherwise.')
+        parser.add_argument('--batch-size', type=int, default=500, help='Records compared and written per batch.')
+        parser.add_argument('--dry-run', action='store_true', help='Print the differences without saving them.')
+        parser.add_argument('--create-groups', action='store_true', help='Create groups that do not exist.')
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='Delete permissions of the imported groups that are not in the file.',
+        )
+
+    def handle(self, *args, **options):
+        self.dry_run = options['dry_run']
+        self.verbose = self.dry_run or options['verbosity'] > 1
+        self.create_groups = options['create_groups']
+        self.groups = dict(Group.objects.values_list('name', 'pk'))
+        self.counts = {'created': 0, 'updated': 0, 'deleted': 0, 'unchanged': 0}
+        batch_size = options['batch_size']
+        self.model = get_permission_model()
+        self.masks = self.model is GroupUrlPermissionMask
+        # Natural key after the group, and the fields compared on import
+        self.key_fields = ('url',) if self.masks else ('url', 'http_method')
+        self.update_fields = ('methods',) + UPDATE_FIELDS if self.masks else UPDATE_FIELDS
+
+        file_format = options['format'] or guess_format(options['input'])
+        stream = open_file(options['input'], 'r', sys.stdin)
+        try:
+            with transaction.atomic():
+                records = read_records(stream, file_format)
+                if self.masks:
+                    # The methods of a URL may be anywhere in the file
+                    records = iter(self.collapse(records))
+                seen = {} if options['prune'] else None
+                while True:
+                    batch = list(islice(records, batch_size))
+                    if not batch:
+                        break
+                    self.apply_batch(batch, batch_size, seen)
+                if seen is not None:
+                    self.prune(seen, batch_size)
+
+                if self.dry_run:
+                    raise DryRun
+                if self.counts['created'] or self.counts['updated'] or self.counts['deleted']:
+                    # bulk_create and bulk_update don't send model signals
+                    notify_url_permissions_changed()
+        except DryRun:
+            pass
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        prefix = 'Dry run: would have ' if self.dry_run else ''
+        self.stdout.write(
+            f"{prefix}created {self.counts['created']}, updated {self.counts['updated']}, "
+            f"deleted {self.counts['deleted']}; {self.counts['unchanged']} unchanged."
+        )
+
+    def get_group_id(self, name):
+        if name not in self.groups:
+            if not self.create_groups:
+                raise CommandError(f'Group {name!r} does not exist; use --create-groups to create it.')
+            if self.verbose:
+                self.stdout.write(f'+ group {name}')
+            self.groups[name] = Group.objects.create(name=name).pk
+        return self.groups[name]
+
+    def collapse(self, records):
+        """Merge the records of each group and URL into one bitmask record."""
+        masks = collapse_grants(
+            (record['group'], record['url'], record['http_method'], record['is_active'], record['description'])
+            for record in records
+        )
+        return [
+            {
+                'group': group,
+                'url': url,
+                'http_method': '|'.join(bits_to_methods(methods)),
+                'methods': methods,
+                'is_active': is_active,
+                'description': description,
+            }
+            for group, url, methods, is_active, description in masks
+        ]
+
+    def apply_batch(self, batch, batch_size, seen):
+        records = {}
+        for record in batch:
+            key = (self.get_group_id(record['group']), *(record[field] for field in self.key_fields))
+            records[key] = record
+            if seen is not None:
+                seen.setdefault(key[0], set()).add(key[1:])
+
+        existing = {
+            (permission.group_id, *(getattr(permission, field) for field in self.key_fields)): permission
+            for permission in self.model.objects.filter(
+                group_id__in={key[0] for key in records},
+                url__in={key[1] for key in records},
+            ).only('pk', 'group_id', *self.key_fields, *self.update_fields)
+        }
+
+        to_create = []
+        to_update = []
+        for key, record in records.items():
+            permission = existing.get(key)
+            if permission is None:
+                to_create.append(self.model(
+                    group_id=key[0],
+                    **{field: record[field] for field in self.key_fields + self.update_fields},
+                ))
+                self.log('+', record)
+                continue
+
+            changes = {
+                field: record[field]
+                for field in self.update_fields
+                if getattr(permission, field) != record[field]
+            }
+            if not changes:
+                self.counts['unchanged'] += 1
+                continue
+            for field, value in changes.items():
+                setattr(permission, field, value)
+            to_update.append(permission)
+            self.log('~', record, ', '.join(f'{field}={value!r}' for field, value in changes.items()))
+
+        self.model.objects.bulk_create(to_create, batch_size=batch_size)
+        self.model.objects.bulk_update(to_update, self.update_fields, batch_size=batch_size)
+        self.counts['created'] += len(to_create)
+        self.counts['updated'] += len(to_update)
+
+    def prune(self, seen, batch_size):
+        group_names = {pk: name for name, pk in self.groups.items()}
+        to_delete = []
+        for group_id, keys in seen.items():
+            rows = self.model.objects.filter(group_id=group_id).values_list(
+                'pk', *self.model.grant_fields,
+            ).iterator(chunk_size=batch_size)
+            for pk, url, grant in rows:
+                http_method = '|'.join(bits_to_methods(grant)) if self.masks else grant
+                if ((url,) if self.masks else (url, http_method)) not in keys:
+                    to_delete.append(pk)
+                    self.log('-', {'group': group_names[group_id], 'url': url, 'http_method': http_method})
+
+        for start in range(0, len(to_delete), batch_size):
+            self.model.objects.filter(pk__in=to_delete[start:start + batch_size]).delete()
+        self.counts['deleted'] += len(to_delete)
+
+    def log(self, sign, record, detail=''):
+        if self.verbose:
+            line = f"{sign} {record['group']} {record['http_method']} {record['url']}"
+            self.stdout.write(f'{line} ({detail})' if detail else line)
@@ -0,0 +1,168 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import csv
+import json
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from ...catalog import get_url_catalog
+from ...matching import UrlMatcher, is_pattern
+from ...models import GroupUrlPermissions, get_permission_model
+from ._formats import FORMATS, guess_format, open_file
+
+METHODS = tuple(method for method, _ in GroupUrlPermissions.HTTP_METHODS if method != 'ALL')
+
+
+class Command(BaseCommand):
+    help = (
+        'Report which users can reach which routes of the URLconf, with which '
+        'HTTP methods, as JSON Lines or CSV.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', nargs='?', default='-', help="Output file, '-' for stdout (default).")
+        parser.add_argument('--format', choices=FORMATS, help='Defaults to csv for .csv files, jsonl otherwise.')
+        parser.add_argument('--user', action='append', dest='users', help='Only report this username (repeatable).')
+        parser.add_argument('--group', action='append', dest='groups', help='Only report members of this group (repeatable).')
+        parser.add_argument('--prefix', action='append', dest='prefixes', help='Only report routes starting with this prefix (repeatable).')
+        parser.add_argument('--include-inactive', action='store_true', help='Also report inactive users.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Users fetched per database round trip.')
+
+    def handle(self, *args, **options):
+        prefixes = tuple(prefix.lstrip('/') for prefix in options['prefixes'] or ())
+        routes = sorted(
+            route for route in get_url_catalog().urls
+            if not prefixes or route.startswith(prefixes)
+        )
+        group_bits = self.get_group_bits(routes)
+        everything = {method: (1 << len(routes)) - 1 for method in METHODS}
+
+        file_format = options['format'] or guess_format(options['output'])
+        stream = open_file(options['output'], 'w', self.stdout)
+        count = 0
+        try:
+            write = self.get_writer(stream, file_format)
+            for username, is_superuser, group_ids in self.iter_users(options):
+                if is_superuser:
+                    user_bits = everything
+                else:
+                    # A user may do what any of their groups may do
+                    user_bits = dict.fromkeys(METHODS, 0)
+                    for group_id in group_ids:
+                        for method, bits in group_bits.get(group_id, {}).items():
+                            user_bits[method] |= bits
+
+                reachable = 0
+                for bits in user_bits.values():
+                    reachable |= bits
+                # Walk the set bits only
+                while reachable:
+                    lowest = reachable & -reachable
+                    index = lowest.bit_length() - 1
+                    reachable ^= lowest
+                    write(username, routes[index], [
+                        method for method in METHODS if user_bits[method] & lowest
+                    ])
+                    count += 1
+        finally:
+            if stream is not self.stdout:
+                stream.close()
+
+        if options['output'] != '-':
+            self.stdout.write(f'Wrote {count} user routes to {options["output"]}.')
+
+    def get_group_bits(self, routes):
+        """
+        Return {group_id: {method: bitset}}, with bit i set when the group
+        may reach routes[i] with the method.
+        """
+        positions = {route: index for index, route in enumerate(routes)}
+        group_bits = {}
+        patterns = UrlMatcher()
+
+        def grant(group_id, index, http_method):
+            bits = group_bits.setdefault(group_id, dict.fromkeys(METHODS, 0))
+            for method in METHODS if http_method == 'ALL' else (http_method,):
+                if method in bits:
+                    bits[method] |= 1 << index
+
+        for group_id, url, http_method in get_permission_model().active_grants():
+            if url.startswith('/'):
+                url = url[1:]
+            if url in positions:
+                grant(group_id, positions[url], http_method)
+            elif is_pattern(url):
+                patterns.add(url, (group_id, http_method))
+
+        if patterns:
+            for index, route in enumerate(routes):
+                for group_id, http_method in patterns.match(route):
+                    grant(group_id, index, http_method)
+        return group_bits
+
+    def iter_users(self, options):
+        """
+        Yield (username, is_superuser, group ids) per user, merging the
+        users and the memberships, both ordered by user id.
+        """
+        User = get_user_model()
+        users = User.objects.order_by('pk')
+        if not options['include_inactive'] and hasattr(User, 'is_active'):
+            users = users.filter(is_active=True)
+        if options['users']:
+            users = users.filter(**{f'{User.USERNAME_FIELD}__in': options['users']})
+        if options['groups']:
+            users = users.filter(groups__name__in=options['groups']).distinct()
+
+        memberships = User.groups.through.objects.order_by('user_id').values_list('user_id', 'group_id')
+        if options['users'] or options['groups']:
+            memberships = memberships.filter(user_id__in=users.values('pk'))
+        memberships = memberships.iterator(chunk_size=options['chunk_size'])
+        membership = next(memberships, None)
+
+        rows = users.values_list('pk', User.USERNAME_FIELD, 'is_superuser').iterator(
+            chunk_size=options['chunk_size'],
+        )
+        for pk, username, is_superuser in rows:
+            group_ids = []
+            while membership is not None and membership[0] <= pk:
+                if membership[0] == pk:
+                    group_ids.append(membership[1])
+                membership = next(memberships, None)
+            yield username, is_superuser, group_ids
+
+    def get_writer(self, stream, file_format):
+        if file_format == 'csv':
+            writer = csv.writer(stream)
+            writer.writerow(('user', 'route') + METHODS)
+            return lambda username, route, methods: writer.writerow(
+                [username, route] + [int(method in methods) for method in METHODS]
+            )
+        return lambda username, route, methods: stream.write(
+            json.dumps({'user': username, 'route': route, 'methods': methods}) + '\n'
+        )
@@ -0,0 +1,264 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+from django.urls.converters import get_converters
+
+WILDCARD = '*'
+GLOBSTAR = '**'
+
+PARAMETER_RE = re.compile(r'<(?:(?P<converter>[^>:]+):)?(?P<parameter>[^>]+)>')
+
+# Permissions on url names are stored as 'name:' + the namespaced view
+# name, e.g. 'name:shop:item', apart from paths and routes.
+NAME_PREFIX = 'name:'
+
+
+def is_pattern(url):
+    """Return True if the URL uses wildcards or path converters."""
+    return ('*' in url or '<' in url) and not is_url_name(url)
+
+
+def name_key(view_name):
+    """Return the stored url of a permission on a url name."""
+    return NAME_PREFIX + view_name
+
+
+def is_url_name(url):
+    """Return True if the URL is a url name key, see name_key."""
+    return url.startswith(NAME_PREFIX)
+
+
+def split_url(url):
+    """Split a URL into segments, ignoring a leading slash."""
+    if url.startswith('/'):
+        url = url[1:]
+    return url.split('/')
+
+
+def compile_segment(segment):
+    """Return a compiled regex for a segment with path converters."""
+    parts = []
+    end = 0
+    converters = get_converters()
+    for match in PARAMETER_RE.finditer(segment):
+        parts.append(re.escape(segment[end:match.start()]))
+        converter = converters.get(match.group('converter') or 'str')
+        parts.append(f'(?:{converter.regex})' if converter else '[^/]+')
+        end = match.end()
+    parts.append(re.escape(segment[end:]))
+    return re.compile(''.join(parts))
+
+
+class _Node:
+    __slots__ = ('literals', 'wildcard', 'globstar', 'converters', 'values', 'loop')
+
+    def __init__(self, loop=False):
+        self.literals = {}
+        self.wildcard = None
+        self.globstar = None
+        self.converters = []
+        self.values = set()
+        # A globstar node keeps matching any further segment.
+        self.loop = loop
+
+
+class UrlMatcher:
+    """
+    Segment trie of URL patterns.
+
+    Patterns are split on '/'; each segment is a literal, '*' (exactly one
+    non-empty segment), '**' (zero or more segments) or a segment with
+    Django path converters such as '<int:pk>'. A converter segment also matches its own
+    literal text, so a resolved route like 'api/<int:pk>/' matches the rule
+    stored for it. Matching costs one trie step per path segment, whatever
+    the number of rules.
+    """
+
+    def __init__(self, rules=()):
+        self._root = _Node()
+        self._size = 0
+        for pattern, value in rules:
+            self.add(pattern, value)
+
+    def __len__(self):
+        return self._size
+
+    def add(self, pattern, value):
+        node = self._root
+        for segment in split_url(pattern):
+            match = PARAMETER_RE.fullmatch(segment)
+            if match and match.group('converter') == 'path':
+                # <path:...> spans one or more segments.
+                node = self._child(self._child(node, WILDCARD), GLOBSTAR)
+            else:
+                node = self._child(node, segment)
+        node.values.add(value)
+        self._size += 1
+
+    def _child(self, node, segment):
+        if segment == GLOBSTAR:
+            if node.globstar is None:
+                node.globstar = _Node(loop=True)
+            return node.globstar
+        if segment == WILDCARD:
+            if node.wildcard is None:
+                node.wildcard = _Node()
+            return node.wildcard
+
+        child = node.literals.get(segment)
+        if child is None:
+            child = node.literals[segment] = _Node()
+            if '<' in segment:
+                node.converters.append((compile_segment(segment), child))
+        return child
+
+    @staticmethod
+    def _closure(nodes):
+        stack = list(nodes)
+        seen = set()
+        result = []
+        while stack:
+            node = stack.pop()
+            if id(node) in seen:
+                continue
+            seen.add(id(node))
+            result.append(node)
+            if node.globstar is not None:
+                stack.append(node.globstar)
+        return result
+
+    def match(self, url):
+        """
+        Return the set of values of every pattern matching the URL. Url
+        names only match their exact key, never a pattern.
+        """
+        if is_url_name(url):
+            return set()
+        nodes = self._closure([self._root])
+        for segment in split_url(url):
+            following = []
+            for node in nodes:
+                child = node.literals.get(segment)
+                if child is not None:
+                    following.append(child)
+                if node.wildcard is not None and segment:
+                    following.append(node.wildcard)
+                for regex, child in node.converters:
+                    if regex.fullmatch(segment):
+                        following.append(child)
+                if node.loop:
+                    following.append(node)
+            if not following:
+                return set()
+            nodes = self._closure(following)
+
+        values = set()
+        for node in nodes:
+            values |= node.values
+        return values
+
+    def matches(self, url):
+        """Return True if any pattern matches the URL."""
+        return bool(self.match(url))
+
+
+def compile_prefixes(prefixes):
+    """
+    Compile URL prefixes into one regex whose alternatives share their
+    common prefixes, so a match scans the path once. Returns None if there
+    are no prefixes.
+    """
+    trie = {}
+    for prefix in prefixes:
+        node = trie
+        for char in prefix:
+            node = node.setdefault(char, {})
+        # An empty key marks the end of a prefix.
+        node[''] = {}
+    if not trie:
+        return None
+
+    def to_regex(node):
+        if '' in node:
+            # Any longer prefix below this node is redundant.
+            return ''
+        alternatives = [re.escape(char) + to_regex(child) for char, child in sorted(node.items())]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    return re.compile(to_regex(trie))
+
+
+@lru_cache(maxsize=256)
+def compile_rules(rules):
+    """Return a cached UrlMatcher for a hashable collection of (pattern, value)."""
+    return UrlMatcher(rules)
+
+
+@lru_cache(maxsize=256)
+def compile_patterns(patterns):
+    """Return a cached UrlMatcher of a frozenset of patterns, whose value is True."""
+    return UrlMatcher((pattern, True) for pattern in patterns)
+
+
+def rules_key(rules):
+    """Return a short digest of an ordered sequence of rules, see compile_keyed_rules."""
+    return hashlib.blake2b(repr(tuple(rules)).encode(), digest_size=16).hexdigest()
+
+
+_keyed_matchers = OrderedDict()
+_keyed_matchers_lock = threading.Lock()
+KEYED_MATCHERS_SIZE = 256
+
+
+def compile_keyed_rules(key, get_rules):
+    """
+    Return a cached UrlMatcher for the (pattern, value) rules returned by
+    get_rules().
+
+    Unlike compile_rules the cache is keyed on `key` alone, a rules_key()
+    computed once when the rules are stored, so a hit doesn't hash every
+    rule and get_rules is only called on a miss.
+    """
+    with _keyed_matchers_lock:
+        matcher = _keyed_matchers.get(key)
+        if matcher is not None:
+            _keyed_matchers.move_to_end(key)
+            return matcher
+
+    matcher = UrlMatcher(get_rules())
+    with _keyed_matchers_lock:
+        _keyed_matchers[key] = matcher
+        if len(_keyed_matchers) > KEYED_MATCHERS_SIZE:
+            _keyed_matchers.popitem(last=False)
+    return matcher
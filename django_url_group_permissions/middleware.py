@@ -24,89 +24,399 @@
 # This source code is part of the "django_url_group_permissions" project.
 # Intellectual property of IT ELAZOS SL.
 
+from functools import lru_cache
+
+from asgiref.sync import sync_to_async
 from django.http import HttpResponseForbidden
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.utils.deprecation import MiddlewareMixin
-from .models.models import GroupUrlPermissions
+from .claims import aissue_claims, aread_claims, get_token, issue_claims, read_claims, set_claims_cookie
+from .engines import get_engine
+from .instrumentation import ALLOW, DENY, EXEMPT, NULL_TRACKER, SKIP, Tracker, get_hooks
+from .matching import compile_prefixes, is_url_name, name_key
+from .warmup import warmup_once
 from django.urls import get_resolver, is_valid_path
 from django.utils.translation import get_language
 
+try:
+    from asgiref.sync import iscoroutinefunction
+except ImportError:  # asgiref < 3.6
+    from asyncio import iscoroutinefunction
+
+MODES = ('request', 'view')
+
+
+async def aget_user(request):
+    """Return the authenticated user without blocking the event loop."""
+    if hasattr(request, 'auser'):
+        return await request.auser()
+
+    def load_user():
+        user = request.user
+        # Force the lazy object to load while we are in a thread.
+        user.is_authenticated
+        return user
+
+    return await sync_to_async(load_user)()
+
 
 class UrlPermissionMiddleware(MiddlewareMixin):
     """
     Middleware to check if the user's groups have permission to access the current URL.
+
+    In 'request' mode (default) the check runs in process_request against the
+    request path. In 'view' mode it runs in process_view and reuses Django's
+    own request.resolver_match, looking permissions up by route and url name.
+
+    In both modes the middleware first finds out whether the view needs a
+    permission check, and only loads request.user when it does.
+
+    The middleware is sync and async capable. Under ASGI the checks run on
+    the event loop through the engines' async methods.
+
+    With URL_PERMISSION_CLAIMS, signed permission claims sent with the
+    request decide without asking the engine, see claims.py.
+
+    When instrumentation hooks or URL_PERMISSION_SERVER_TIMING are
+    configured, every decision is timed per phase and reported to the
+    hooks; otherwise a no-op tracker is used.
     """
+
+    sync_capable = True
+    async_capable = True
     
     def __init__(self, get_response):
         super().__init__(get_response)
         self.exempt_urls = getattr(settings, 'URL_PERMISSION_EXEMPT_URLS', [])
         self.permission_required = getattr(settings, 'URL_PERMISSION_REQUIRED', True)
         self.check_all_views = getattr(settings, 'URL_PERMISSION_CHECK_ALL_VIEWS', False)
+        self.mode = getattr(settings, 'URL_PERMISSION_MODE', 'request')
+        if self.mode not in MODES:
+            raise ImproperlyConfigured(
+                f"URL_PERMISSION_MODE must be one of {', '.join(MODES)}, got {self.mode!r}."
+            )
+        self.engine = get_engine()
+        self.claims = getattr(settings, 'URL_PERMISSION_CLAIMS', False)
+
+        # Compile the exempt prefixes and language prefixes once.
+        self.exempt_re = compile_prefixes(self.exempt_urls)
+        self.language_prefixes = {
+            lang_code: f'/{lang_code}/'
+            for lang_code, _ in getattr(settings, 'LANGUAGES', ())
+        }
+        cache_size = getattr(settings, 'URL_PERMISSION_PATH_CACHE_SIZE', 1024)
+        if cache_size:
+            self._normalize_path = lru_cache(maxsize=cache_size)(self._normalize_path)
+            self._resolve_protection = lru_cache(maxsize=cache_size)(self._resolve_protection)
+
+        self.hooks = get_hooks()
+        self.server_timing = getattr(settings, 'URL_PERMISSION_SERVER_TIMING', False)
+        self.instrumented = bool(self.hooks) or self.server_timing
+
+        if getattr(settings, 'URL_PERMISSION_WARMUP', False):
+            # Handlers load middleware once every app is ready and before
+            # the first request. Close the connections in case the process
+            # forks workers next.
+            warmup_once(close_connections=True)
+
+        if iscoroutinefunction(get_response):
+            # The handler adapts process_view to its own mode; hand it the
+            # coroutine so Django doesn't run it in a thread.
+            self.process_view = self.aprocess_view
 
     def is_exempt_url(self, path):
         """Check if the URL is exempt from permission checks."""
-        return any(path.startswith(exempt_url) for exempt_url in self.exempt_urls)
+        return self.exempt_re is not None and self.exempt_re.match(path) is not None
 
     def get_path_without_language(self, path):
         """Remove language prefix from path if it exists."""
-        if hasattr(settings, 'LANGUAGES'):
-            current_language = get_language()
-            if current_language:
-                language_prefix = f'/{current_language}/'
-                if path.startswith(language_prefix):
-                    return path[len(language_prefix)-1:]
-        return path
+        return self.normalize_path(path)[0]
 
-    def process_request(self, request):
-        # Get path without language prefix for permission checking
-        path_to_check = self.get_path_without_language(request.path)
-        
-        # Skip permission check for exempt URLs        
-        if self.is_exempt_url(path_to_check):
-            return None
-    
-        # Skip permission check if URL_PERMISSION_REQUIRED is False
-        if not self.permission_required:
-            return None
+    def normalize_path(self, path):
+        """
+        Return the path without the active language prefix and whether it is
+        exempt. Results are kept in an LRU cache of
+        URL_PERMISSION_PATH_CACHE_SIZE entries.
+        """
+        return self._normalize_path(path, get_language())
 
+    def _normalize_path(self, path, current_language):
+        if current_language:
+            language_prefix = self.language_prefixes.get(current_language) or f'/{current_language}/'
+            if path.startswith(language_prefix):
+                path = path[len(language_prefix)-1:]
+        return path, self.is_exempt_url(path)
+
+    def get_route_without_language(self, route):
+        """Remove language prefix from a resolved route if it exists."""
+        if hasattr(settings, 'LANGUAGES'):
+            for lang_code, _ in settings.LANGUAGES:
+                prefix = f'{lang_code}/'
+                if route.startswith(prefix):
+                    return route[len(prefix):]
+        return route
+
+    def skip_user(self, user):
+        """Return True if the user doesn't need a permission check."""
         # Always allow authentication-related URLs
-        if not request.user.is_authenticated:
-            return None
+        if not user.is_authenticated:
+            return True
         
         # Skip permission check for superusers
-        if request.user.is_superuser:
-            return None
+        return user.is_superuser
 
-        # Get the view function
-        resolver = get_resolver()
+    def resolve_protection(self, request, path_to_check):
+        """
+        Return the route the path resolves to and whether its view requires
+        a permission check. Results are kept in an LRU cache of
+        URL_PERMISSION_PATH_CACHE_SIZE entries, per URLconf.
+        """
+        return self._resolve_protection(path_to_check, request.path, get_resolver())
+
+    def _resolve_protection(self, path_to_check, path, resolver):
         try:
             resolver_match = resolver.resolve(path_to_check)
-            view_func = resolver_match.func
         except:
             # If resolution fails with the modified path, try original path
-            resolver_match = resolver.resolve(request.path)
-            view_func = resolver_match.func
+            resolver_match = resolver.resolve(path)
+        return resolver_match.route, self.requires_permission(resolver_match.func)
 
-        # Check if permissions should be checked
-        check_permissions = (
+    def requires_permission(self, view_func):
+        """Check if permissions should be checked for the view."""
+        return (
             self.check_all_views or 
             getattr(view_func, 'requires_url_permission', False)
         )
-        
-        if not check_permissions:
+
+    def forbidden(self):
+        return HttpResponseForbidden("You don't have permission to access this URL.")
+
+    def get_claims(self, request, user):
+        """
+        Return the current permission claims sent with the request, if
+        claims are enabled. Stale or invalid claims are replaced by fresh
+        ones in the response.
+        """
+        if not self.claims or request is None:
+            return None
+        claims = read_claims(request, user)
+        if claims is None and get_token(request):
+            request.url_permission_claims = issue_claims(user)
+        return claims
+
+    async def aget_claims(self, request, user):
+        """Async version of get_claims."""
+        if not self.claims or request is None:
             return None
+        claims = await aread_claims(request, user)
+        if claims is None and get_token(request):
+            request.url_permission_claims = await aissue_claims(user)
+        return claims
+
+    def check_permission(self, user, method, urls, request=None):
+        """
+        Allow the request if the user may access any of the given URLs.
+        The engine is asked once for all of them.
+        """
+        claims = self.get_claims(request, user)
+        if claims is not None:
+            allowed = any(claims.allows(url, method) for url in urls)
+        else:
+            allowed = self.engine.has_any_url_permission(user=user, urls=urls, method=method)
+        return None if allowed else self.forbidden()
+
+    async def acheck_permission(self, user, method, urls, request=None):
+        """Async version of check_permission."""
+        claims = await self.aget_claims(request, user)
+        if claims is not None:
+            allowed = any(claims.allows(url, method) for url in urls)
+        else:
+            allowed = await self.engine.ahas_any_url_permission(user=user, urls=urls, method=method)
+        return None if allowed else self.forbidden()
+
+    def get_view_urls(self, resolver_match):
+        """
+        Return the route and the url name key a resolved view is checked
+        against. Names are kept apart from paths as 'name:<view name>', and
+        only match a permission on that exact key.
+        """
+        urls = []
+        if resolver_match.route:
+            urls.append(self.get_route_without_language(resolver_match.route))
+        if resolver_match.url_name:
+            urls.append(name_key(resolver_match.view_name))
+        return urls
+
+    def get_path_urls(self, path):
+        """
+        Return the path the request is checked against. A path that would
+        read as a url name key is checked against nothing, i.e. denied.
+        """
+        return [] if is_url_name(path[1:]) else [path]
+
+    def start_tracking(self, request, path, count_queries=True):
+        if not self.instrumented:
+            return NULL_TRACKER
+        return Tracker(request, path, self.hooks, count_queries=count_queries)
+
+    def process_request(self, request):
+        if self.mode != 'request':
+            return None
+
+        tracker = self.start_tracking(request, request.path)
+        try:
+            return self._process_request(request, tracker)
+        finally:
+            tracker.stop()
+
+    def _process_request(self, request, tracker):
+        # Get path without language prefix for permission checking
+        path_to_check, is_exempt = self.normalize_path(request.path)
+
+        # Skip permission check for exempt URLs        
+        if is_exempt:
+            return tracker.finish(EXEMPT)
+
+        # Skip permission check if URL_PERMISSION_REQUIRED is False
+        if not self.permission_required:
+            return tracker.finish(SKIP)
+        tracker.mark('path')
+
+        # Resolve before touching request.user, so requests to views that
+        # don't need a check never load the session or the user
+        route, protected = self.resolve_protection(request, path_to_check)
+        tracker.set_route(route)
+        tracker.mark('resolve')
+        if not protected:
+            return tracker.finish(SKIP)
+
+        user = request.user
+        tracker.set_user(user)
+        if self.skip_user(user):
+            return tracker.finish(SKIP)
+        tracker.mark('user')
+
+        # Use the path without language prefix
+        response = self.check_permission(
+            user, request.method, self.get_path_urls(path_to_check), request,
+        )
+        tracker.mark('permission')
+        return tracker.finish(DENY if response else ALLOW, response)
+
+    async def aprocess_request(self, request):
+        """Async version of process_request."""
+        if self.mode != 'request':
+            return None
+
+        # Queries run in other threads and can't be counted here
+        tracker = self.start_tracking(request, request.path, count_queries=False)
+        path_to_check, is_exempt = self.normalize_path(request.path)
+
+        if is_exempt:
+            return tracker.finish(EXEMPT)
+        if not self.permission_required:
+            return tracker.finish(SKIP)
+        tracker.mark('path')
+
+        route, protected = self.resolve_protection(request, path_to_check)
+        tracker.set_route(route)
+        tracker.mark('resolve')
+        if not protected:
+            return tracker.finish(SKIP)
+
+        user = await aget_user(request)
+        tracker.set_user(user)
+        if self.skip_user(user):
+            return tracker.finish(SKIP)
+        tracker.mark('user')
+
+        response = await self.acheck_permission(
+            user, request.method, self.get_path_urls(path_to_check), request,
+        )
+        tracker.mark('permission')
+        return tracker.finish(DENY if response else ALLOW, response)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if self.mode != 'view':
+            return None
+
+        tracker = self.start_tracking(request, request.path)
+        try:
+            return self._process_view(request, view_func, tracker)
+        finally:
+            tracker.stop()
+
+    def _process_view(self, request, view_func, tracker):
+        path_to_check, is_exempt = self.normalize_path(request.path)
+        # Django has already resolved the URL for dispatch
+        resolver_match = request.resolver_match
+        tracker.set_route(resolver_match.route)
+
+        if is_exempt:
+            return tracker.finish(EXEMPT)
+        if not self.permission_required:
+            return tracker.finish(SKIP)
+        if not self.requires_permission(view_func):
+            return tracker.finish(SKIP)
+        tracker.mark('path')
+
+        user = request.user
+        tracker.set_user(user)
+        if self.skip_user(user):
+            return tracker.finish(SKIP)
+        tracker.mark('user')
+
+        response = self.check_permission(
+            user, request.method, self.get_view_urls(resolver_match), request,
+        )
+        tracker.mark('permission')
+        return tracker.finish(DENY if response else ALLOW, response)
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        """Async version of process_view."""
+        if self.mode != 'view':
+            return None
+
+        tracker = self.start_tracking(request, request.path, count_queries=False)
+        path_to_check, is_exempt = self.normalize_path(request.path)
+        resolver_match = request.resolver_match
+        tracker.set_route(resolver_match.route)
+
+        if is_exempt:
+            return tracker.finish(EXEMPT)
+        if not self.permission_required:
+            return tracker.finish(SKIP)
+        if not self.requires_permission(view_func):
+            return tracker.finish(SKIP)
+        tracker.mark('path')
 
-        # Get the current HTTP method
-        method = request.method
+        user = await aget_user(request)
+        tracker.set_user(user)
+        if self.skip_user(user):
+            return tracker.finish(SKIP)
+        tracker.mark('user')
 
-        # Check if user has permission for this URL
-        has_permission = GroupUrlPermissions.has_url_permission(
-            user=request.user,
-            url=path_to_check,  # Use the path without language prefix
-            method=method
+        response = await self.acheck_permission(
+            user, request.method, self.get_view_urls(resolver_match), request,
         )
+        tracker.mark('permission')
+        return tracker.finish(DENY if response else ALLOW, response)
 
-        if not has_permission:
-            return HttpResponseForbidden("You don't have permission to access this URL.")
+    def process_response(self, request, response):
+        if self.server_timing:
+            decision = getattr(request, 'url_permission_decision', None)
+            if decision is not None and decision.phases:
+                timing = decision.server_timing()
+                if response.has_header('Server-Timing'):
+                    timing = f"{response['Server-Timing']}, {timing}"
+                response['Server-Timing'] = timing
+        token = getattr(request, 'url_permission_claims', None)
+        if token is not None:
+            set_claims_cookie(response, token)
+        return response
 
-        return None
+    async def __acall__(self, request):
+        response = await self.aprocess_request(request)
+        response = response or await self.get_response(request)
+        return self.process_response(request, response)
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('django_url_group_permissions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='groupurlpermissions',
+            name='django_url__url_7c741b_idx',
+        ),
+        migrations.AddIndex(
+            model_name='groupurlpermissions',
+            index=models.Index(fields=['url', 'group', 'http_method', 'is_active'], name='url_perm_lookup_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupurlpermissions',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['url', 'group', 'http_method'], name='url_perm_active_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:21
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_url_group_permissions', '0002_permission_lookup_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UrlPermissionAuditLog',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('username', models.CharField(blank=True, max_length=150)),
+                ('path', models.CharField(max_length=2048)),
+                ('route', models.CharField(blank=True, max_length=255)),
+                ('http_method', models.CharField(max_length=10)),
+                ('outcome', models.CharField(choices=[('allow', 'Allowed'), ('deny', 'Denied')], max_length=10)),
+                ('created_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('user', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'URL permission audit log',
+                'verbose_name_plural': 'URL permission audit logs',
+                'ordering': ('-created_at',),
+            },
+        ),
+    ]
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def create_routes(apps, schema_editor):
+    """Create a route for every URL used by a permission and link the rows."""
+    GroupUrlPermissions = apps.get_model('django_url_group_permissions', 'GroupUrlPermissions')
+    UrlRoute = apps.get_model('django_url_group_permissions', 'UrlRoute')
+    urls = sorted(
+        url for url in GroupUrlPermissions.objects.order_by().values_list('url', flat=True).distinct()
+        if '*' not in url
+    )
+    UrlRoute.objects.bulk_create([UrlRoute(route=url) for url in urls], batch_size=500)
+    for route_id, url in UrlRoute.objects.values_list('id', 'route').iterator():
+        GroupUrlPermissions.objects.filter(url=url).update(route_id=route_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('django_url_group_permissions', '0003_urlpermissionauditlog'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UrlRoute',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('route', models.CharField(max_length=255, unique=True)),
+                ('is_stale', models.BooleanField(default=False, help_text='Whether the route is no longer in the URLconf')),
+            ],
+            options={
+                'verbose_name': 'URL route',
+                'verbose_name_plural': 'URL routes',
+                'ordering': ('route',),
+            },
+        ),
+        migrations.AddField(
+            model_name='groupurlpermissions',
+            name='route',
+            field=models.ForeignKey(blank=True, editable=False, help_text='The route matching url, set when the permission is saved', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='permissions', to='django_url_group_permissions.urlroute'),
+        ),
+        migrations.RunPython(create_routes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='groupurlpermissions',
+            index=models.Index(fields=['route', 'group', 'http_method', 'is_active'], name='url_perm_route_lookup_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# HTTP_METHOD_BITS when this migration was written
+METHOD_BITS = {
+    'GET': 1 << 0,
+    'POST': 1 << 1,
+    'PUT': 1 << 2,
+    'PATCH': 1 << 3,
+    'DELETE': 1 << 4,
+    'HEAD': 1 << 5,
+    'OPTIONS': 1 << 6,
+    'ALL': 1 << 7,
+}
+
+
+def collapse_permissions(apps, schema_editor):
+    """
+    Collapse the per-method rows into one bitmask row per group and URL.
+
+    Only active rows contribute their method. A URL whose rows are all
+    inactive keeps its methods on an inactive row.
+    """
+    GroupUrlPermissions = apps.get_model('django_url_group_permissions', 'GroupUrlPermissions')
+    GroupUrlPermissionMask = apps.get_model('django_url_group_permissions', 'GroupUrlPermissionMask')
+    masks = {}
+    rows = GroupUrlPermissions.objects.order_by().values_list(
+        'group_id', 'url', 'route_id', 'http_method', 'is_active', 'description',
+    ).iterator()
+    for group_id, url, route_id, http_method, is_active, description in rows:
+        mask = masks.setdefault((group_id, url), {
+            'route_id': route_id, 'active': 0, 'inactive': 0, 'description': None,
+        })
+        mask['active' if is_active else 'inactive'] |= METHOD_BITS.get(http_method, 0)
+        mask['description'] = mask['description'] or description
+
+    GroupUrlPermissionMask.objects.bulk_create([
+        GroupUrlPermissionMask(
+            group_id=group_id,
+            url=url,
+            route_id=mask['route_id'],
+            methods=mask['active'] or mask['inactive'],
+            is_active=bool(mask['active']),
+            description=mask['description'],
+        )
+        for (group_id, url), mask in masks.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('django_url_group_permissions', '0004_urlroute'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GroupUrlPermissionMask',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('url', models.CharField(help_text='URL pattern (can include wildcards like /api/*/users/)', max_length=255)),
+                ('methods', models.PositiveSmallIntegerField(default=1, help_text='Bitmask of the HTTP methods this permission applies to')),
+                ('is_active', models.BooleanField(default=True, help_text='Whether this permission is currently active')),
+                ('description', models.TextField(blank=True, help_text='Optional description of what this permission does', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('group', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='url_permission_masks', to='auth.group')),
+                ('route', models.ForeignKey(blank=True, editable=False, help_text='The route matching url, set when the permission is saved', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='permission_masks', to='django_url_group_permissions.urlroute')),
+            ],
+            options={
+                'verbose_name': 'URL Permission (bitmask)',
+                'verbose_name_plural': 'URL Permissions (bitmask)',
+                'ordering': ('group__name', 'url'),
+                'indexes': [models.Index(fields=['url', 'group', 'is_active', 'methods'], name='url_perm_mask_lookup_idx'), models.Index(fields=['route', 'group', 'is_active', 'methods'], name='url_perm_mask_route_idx')],
+                'unique_together': {('group', 'url')},
+            },
+        ),
+        migrations.RunPython(collapse_permissions, migrations.RunPython.noop),
+    ]
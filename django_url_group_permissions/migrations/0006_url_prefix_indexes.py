@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 14:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('django_url_group_permissions', '0005_groupurlpermissionmask'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='groupurlpermissionmask',
+            index=models.Index(fields=['url'], name='url_perm_mask_url_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='groupurlpermissions',
+            index=models.Index(fields=['url'], name='url_perm_url_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ),
+    ]
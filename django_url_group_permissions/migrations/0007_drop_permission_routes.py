@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:07
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('django_url_group_permissions', '0006_url_prefix_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='groupurlpermissionmask',
+            name='url_perm_mask_route_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='groupurlpermissions',
+            name='url_perm_route_lookup_idx',
+        ),
+        migrations.RemoveField(
+            model_name='groupurlpermissionmask',
+            name='route',
+        ),
+        migrations.RemoveField(
+            model_name='groupurlpermissions',
+            name='route',
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:09
+
+from django.db import migrations, models
+
+
+def flag_patterns(apps, schema_editor):
+    """Flag the existing rows whose url has wildcards or path converters."""
+    for name in ('GroupUrlPermissions', 'GroupUrlPermissionMask'):
+        model = apps.get_model('django_url_group_permissions', name)
+        model.objects.filter(
+            models.Q(url__contains='*') | models.Q(url__contains='<'),
+        ).update(is_pattern=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('django_url_group_permissions', '0007_drop_permission_routes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='groupurlpermissionmask',
+            name='is_pattern',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether url has wildcards or path converters, set when the permission is saved'),
+        ),
+        migrations.AddField(
+            model_name='groupurlpermissions',
+            name='is_pattern',
+            field=models.BooleanField(default=False, editable=False, help_text='Whether url has wildcards or path converters, set when the permission is saved'),
+        ),
+        migrations.RunPython(flag_patterns, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='groupurlpermissionmask',
+            index=models.Index(condition=models.Q(('is_pattern', True)), fields=['group', 'methods'], name='url_perm_mask_pattern_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='groupurlpermissions',
+            index=models.Index(condition=models.Q(('is_pattern', True)), fields=['group', 'http_method', 'is_active', 'url'], name='url_perm_pattern_idx'),
+        ),
+    ]
@@ -24,12 +24,275 @@
 # This source code is part of the "django_url_group_permissions" project.
 # Intellectual property of IT ELAZOS SL.
 
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 from django.db import models
 from django.contrib.auth.models import Group
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
+from ..matching import compile_patterns, compile_rules, is_pattern
 
-class GroupUrlPermissions(models.Model):
+# One bit per HTTP method, used where permissions are stored compactly.
+# 'ALL' has its own bit so unknown methods are only allowed by 'ALL'.
+HTTP_METHOD_BITS = {
+    'GET': 1 << 0,
+    'POST': 1 << 1,
+    'PUT': 1 << 2,
+    'PATCH': 1 << 3,
+    'DELETE': 1 << 4,
+    'HEAD': 1 << 5,
+    'OPTIONS': 1 << 6,
+    'ALL': 1 << 7,
+}
+
+
+def methods_to_bits(methods):
+    """Return the bitmask of an iterable of HTTP method names."""
+    bits = 0
+    for method in methods:
+        bits |= HTTP_METHOD_BITS.get(method, 0)
+    return bits
+
+
+def bits_to_methods(bits):
+    """Return the HTTP method names set in a bitmask, in HTTP_METHOD_BITS order."""
+    return [method for method, bit in HTTP_METHOD_BITS.items() if bits & bit]
+
+
+def collapse_grants(rows):
+    """
+    Merge (group, url, http_method, is_active, description) rows into one
+    bitmask per group and URL, yielding (group, url, methods, is_active,
+    description).
+
+    Active rows contribute their method; a URL without active rows keeps
+    its methods on an inactive row. Migration 0005 has a frozen copy.
+    """
+    masks = {}
+    for group, url, http_method, is_active, description in rows:
+        mask = masks.setdefault((group, url), {'active': 0, 'inactive': 0, 'description': None})
+        mask['active' if is_active else 'inactive'] |= methods_to_bits([http_method])
+        mask['description'] = mask['description'] or description
+
+    for (group, url), mask in masks.items():
+        yield group, url, mask['active'] or mask['inactive'], bool(mask['active']), mask['description']
+
+
+class UrlRoute(models.Model):
+    """
+    A route of the URLconf, e.g. 'api/items/<int:pk>/'.
+
+    Filled by the sync_url_routes command and after migrate. Routes that
+    disappear from the URLconf are kept and marked stale, so permissions
+    left on removed routes can be found.
+    """
+
+    id = models.AutoField(primary_key=True)
+    route = models.CharField(max_length=255, unique=True)
+    is_stale = models.BooleanField(
+        default=False,
+        help_text=_('Whether the route is no longer in the URLconf')
+    )
+
+    class Meta:
+        ordering = ('route',)
+        verbose_name_plural = _('URL routes')
+        verbose_name = _('URL route')
+
+    def __str__(self):
+        return self.route
+
+
+class UrlPermissionQuerySet(models.QuerySet):
+    """
+    Keeps is_pattern in step with url on bulk writes, which skip save()
+    and the pre_save signal that set it otherwise.
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.is_pattern = is_pattern(obj.url)
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'url' in fields:
+            objs = list(objs)
+            for obj in objs:
+                obj.is_pattern = is_pattern(obj.url)
+            fields = [*fields, 'is_pattern']
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        if isinstance(kwargs.get('url'), str):
+            kwargs['is_pattern'] = is_pattern(kwargs['url'])
+        return super().update(**kwargs)
+
+
+class UrlPermissionLookups:
+    """
+    Permission lookups shared by the row-per-method and the bitmask storage.
+
+    Subclasses define how rows are filtered on HTTP methods and how their
+    `grant_fields` expand to (url, http_method) pairs.
+    """
+
+    # Fields read by expand_grants, after the url
+    grant_fields = ()
+
+    @classmethod
+    def _filter_methods(cls, queryset, methods):
+        """Keep the rows that allow any of `methods`, or 'ALL'."""
+        raise NotImplementedError
+
+    @classmethod
+    def expand_grants(cls, rows):
+        """Yield (url, http_method) for rows of `grant_fields` values."""
+        raise NotImplementedError
+
+    @classmethod
+    def active_grants(cls, chunk_size=5000):
+        """Yield (group_id, url, http_method) for every active permission."""
+        rows = cls.objects.filter(is_active=True).order_by().values_list(
+            'group_id', *cls.grant_fields,
+        ).iterator(chunk_size=chunk_size)
+        for group_id, *grant in rows:
+            for url, http_method in cls.expand_grants([grant]):
+                yield group_id, url, http_method
+
+    @staticmethod
+    def _user_filter(user):
+        """
+        Filter on the user's groups through the user/group table alone,
+        `group_id IN (SELECT group_id FROM auth_user_groups WHERE user_id = ...)`,
+        without joining auth_group.
+        """
+        field = user._meta.get_field('groups')
+        memberships = field.remote_field.through.objects.filter(
+            **{field.m2m_field_name(): user.pk},
+        ).values(field.m2m_reverse_field_name())
+        return {'group_id__in': memberships}
+
+    @classmethod
+    def _user_permissions(cls, user, method):
+        # No ordering, it would join auth_group for its name
+        return cls._filter_methods(
+            cls.objects.filter(is_active=True, **cls._user_filter(user)),
+            [method.upper()],
+        ).order_by()
+
+    @staticmethod
+    def _url_or_pattern(queryset, urls, *fields):
+        """
+        Return the `fields` of the rows whose url is one of `urls`, plus
+        those of the pattern rows, in one query. Each branch of the UNION is
+        answered by its own index: an equality on url, and the pattern rows
+        of the groups.
+        """
+        exact = queryset.filter(url__in=urls).values_list(*fields)
+        patterns = queryset.filter(is_pattern=True).values_list(*fields)
+        return exact.union(patterns)
+
+    @classmethod
+    def _candidate_urls(cls, user, method, urls):
+        """
+        Return, in one query, the URLs of the user's rows for the method that
+        are one of `urls` or are wildcard or route patterns.
+        """
+        return cls._url_or_pattern(cls._user_permissions(user, method), urls, 'url')
+
+    @staticmethod
+    def _allows_any(urls, candidates):
+        """Check the URLs against the (url,) rows returned by _candidate_urls."""
+        candidates = {url for url, in candidates}
+        if any(url in candidates for url in urls):
+            return True
+        patterns = frozenset(candidate for candidate in candidates if is_pattern(candidate))
+        if not patterns:
+            return False
+        matcher = compile_patterns(patterns)
+        return any(matcher.matches(url) for url in urls)
+
+    @staticmethod
+    def _strip_slashes(urls):
+        return [url[1:] if url.startswith('/') else url for url in urls]
+
+    @classmethod
+    def has_url_permission(cls, user, url, method='GET'):
+        """
+        Check if a user has permission to access a specific URL with given method.
+
+        Stored URLs may be wildcard or route patterns, see matching.UrlMatcher.
+        """
+        return cls.has_any_url_permission(user, [url], method)
+
+    @classmethod
+    def has_any_url_permission(cls, user, urls, method='GET'):
+        """Check if a user may access any of the URLs with given method, with a single query."""
+        if user.is_superuser:
+            return True
+
+        urls = cls._strip_slashes(urls)
+        candidates = list(cls._candidate_urls(user, method, urls))
+        return cls._allows_any(urls, candidates)
+
+    @classmethod
+    async def ahas_url_permission(cls, user, url, method='GET'):
+        """Async version of has_url_permission."""
+        return await cls.ahas_any_url_permission(user, [url], method)
+
+    @classmethod
+    async def ahas_any_url_permission(cls, user, urls, method='GET'):
+        """Async version of has_any_url_permission."""
+        if user.is_superuser:
+            return True
+
+        urls = cls._strip_slashes(urls)
+        candidates = [candidate async for candidate in cls._candidate_urls(user, method, urls)]
+        return cls._allows_any(urls, candidates)
+
+    @classmethod
+    def has_url_permissions(cls, user, checks, group_ids=None):
+        """
+        Check many (url, method) pairs at once with a single query.
+
+        Returns a dict mapping each (url, method) pair to a bool. Pass the
+        user's group ids to avoid the user.groups subquery.
+        """
+        checks = list(checks)
+        if user.is_superuser:
+            return {check: True for check in checks}
+
+        normalized = {
+            check: (check[0][1:] if check[0].startswith('/') else check[0], check[1].upper())
+            for check in checks
+        }
+        if group_ids is None:
+            queryset = cls.objects.filter(**cls._user_filter(user))
+        else:
+            queryset = cls.objects.filter(group_id__in=group_ids)
+        queryset = cls._filter_methods(
+            queryset.filter(is_active=True),
+            {method for _, method in normalized.values()},
+        ).order_by()
+        grants = set(cls.expand_grants(cls._url_or_pattern(
+            queryset, {url for url, _ in normalized.values()}, *cls.grant_fields,
+        )))
+
+        patterns = frozenset(grant for grant in grants if is_pattern(grant[0]))
+        matcher = compile_rules(patterns) if patterns else None
+        decisions = {}
+        for check, (url, method) in normalized.items():
+            allowed = (url, method) in grants or (url, 'ALL') in grants
+            if not allowed and matcher is not None:
+                matched = matcher.match(url)
+                allowed = method in matched or 'ALL' in matched
+            decisions[check] = allowed
+        return decisions
+
+
+class GroupUrlPermissions(UrlPermissionLookups, models.Model):
     HTTP_METHODS = (
         ('GET', 'GET'),
         ('POST', 'POST'),
@@ -55,6 +318,11 @@ class GroupUrlPermissions(models.Model):
         blank=False,
         help_text=_('URL pattern (can include wildcards like /api/*/users/)')
     )
+    is_pattern = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text=_('Whether url has wildcards or path converters, set when the permission is saved')
+    )
     http_method = models.CharField(
         max_length=10,
         choices=HTTP_METHODS,
@@ -73,38 +341,187 @@ class GroupUrlPermissions(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = UrlPermissionQuerySet.as_manager()
+
     class Meta:
         ordering = ('group__name', 'url')
         verbose_name_plural = _('URL Permissions')
         verbose_name = _('URL Permission')
         unique_together = ('group', 'url', 'http_method')
         indexes = [
-            models.Index(fields=['url']),
-            models.Index(fields=['http_method']),
+            models.Index(fields=['http_method'], name='django_url__http_me_61e08d_idx'),
+            # Matches has_url_permission: url first, then group and method,
+            # with is_active so the lookup is answered from the index alone
+            models.Index(
+                fields=['url', 'group', 'http_method', 'is_active'],
+                name='url_perm_lookup_idx',
+            ),
+            # Smaller index of the active rows, on backends with partial indexes
+            models.Index(
+                fields=['url', 'group', 'http_method'],
+                condition=models.Q(is_active=True),
+                name='url_perm_active_lookup_idx',
+            ),
+            # The pattern rows of the user's groups, next to the url lookup
+            models.Index(
+                fields=['group', 'http_method', 'is_active', 'url'],
+                condition=models.Q(is_pattern=True),
+                name='url_perm_pattern_idx',
+            ),
+            # Prefix search (LIKE 'api/%') in the admin; PostgreSQL only
+            # uses an index for it with a pattern operator class
+            models.Index(
+                fields=['url'],
+                name='url_perm_url_prefix_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
         ]
 
     def __str__(self):
         return f"{self.group.name} - {self.http_method} {self.url}"
 
+    grant_fields = ('url', 'http_method')
+
     @classmethod
-    def has_url_permission(cls, user, url, method='GET'):
-        """
-        Check if a user has permission to access a specific URL with given method.
-        """        
+    def _filter_methods(cls, queryset, methods):
+        return queryset.filter(http_method__in={*methods, 'ALL'})
 
-        if url.startswith('/'):
-            url = url[1:]
+    @classmethod
+    def expand_grants(cls, rows):
+        return rows
 
-        if user.is_superuser:
-            return True
-            
-        user_groups = user.groups.all()
-        return cls.objects.filter(
-            group__in=user_groups,
-            url=url,
-            is_active=True,
-        ).filter(
-            models.Q(http_method=method.upper()) | 
-            models.Q(http_method='ALL')
-        ).exists()
 
+class GroupUrlPermissionMask(UrlPermissionLookups, models.Model):
+    """
+    URL permissions stored as one row per group and URL, with the allowed
+    HTTP methods as a bitmask of HTTP_METHOD_BITS.
+
+    Used instead of GroupUrlPermissions when URL_PERMISSION_STORAGE is
+    'bitmask'.
+    """
+
+    id = models.AutoField(primary_key=True)
+    group = models.ForeignKey(
+        Group,
+        on_delete=models.CASCADE,
+        related_name='url_permission_masks'
+    )
+    url = models.CharField(
+        max_length=255,
+        help_text=_('URL pattern (can include wildcards like /api/*/users/)')
+    )
+    is_pattern = models.BooleanField(
+        default=False,
+        editable=False,
+        help_text=_('Whether url has wildcards or path converters, set when the permission is saved')
+    )
+    methods = models.PositiveSmallIntegerField(
+        default=HTTP_METHOD_BITS['GET'],
+        help_text=_('Bitmask of the HTTP methods this permission applies to')
+    )
+    is_active = models.BooleanField(
+        default=True,
+        help_text=_('Whether this permission is currently active')
+    )
+    description = models.TextField(
+        null=True,
+        blank=True,
+        help_text=_('Optional description of what this permission does')
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = UrlPermissionQuerySet.as_manager()
+
+    class Meta:
+        ordering = ('group__name', 'url')
+        verbose_name_plural = _('URL Permissions (bitmask)')
+        verbose_name = _('URL Permission (bitmask)')
+        unique_together = ('group', 'url')
+        indexes = [
+            models.Index(
+                fields=['url', 'group', 'is_active', 'methods'],
+                name='url_perm_mask_lookup_idx',
+            ),
+            models.Index(
+                fields=['group', 'methods'],
+                condition=models.Q(is_pattern=True),
+                name='url_perm_mask_pattern_idx',
+            ),
+            models.Index(
+                fields=['url'],
+                name='url_perm_mask_url_prefix_idx',
+                opclasses=['varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.group.name} - {'|'.join(self.http_methods)} {self.url}"
+
+    @property
+    def http_methods(self):
+        return bits_to_methods(self.methods)
+
+    grant_fields = ('url', 'methods')
+
+    @classmethod
+    def _filter_methods(cls, queryset, methods):
+        wanted = methods_to_bits(methods) | HTTP_METHOD_BITS['ALL']
+        return queryset.alias(
+            granted_methods=models.F('methods').bitand(wanted),
+        ).filter(granted_methods__gt=0)
+
+    @classmethod
+    def expand_grants(cls, rows):
+        for url, bits in rows:
+            for method in bits_to_methods(bits):
+                yield url, method
+
+
+STORAGES = {
+    'rows': GroupUrlPermissions,
+    'bitmask': GroupUrlPermissionMask,
+}
+
+
+def get_permission_model():
+    """Return the model selected by URL_PERMISSION_STORAGE."""
+    storage = getattr(settings, 'URL_PERMISSION_STORAGE', 'rows')
+    try:
+        return STORAGES[storage]
+    except KeyError:
+        raise ImproperlyConfigured(
+            f"URL_PERMISSION_STORAGE must be one of {', '.join(STORAGES)}, got {storage!r}."
+        )
+
+
+class UrlPermissionAuditLog(models.Model):
+    OUTCOMES = (
+        ('allow', _('Allowed')),
+        ('deny', _('Denied')),
+    )
+
+    id = models.BigAutoField(primary_key=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        # Keep the audit trail when a user is deleted
+        on_delete=models.DO_NOTHING,
+        null=True,
+        blank=True,
+        related_name='+',
+        db_constraint=False,
+    )
+    username = models.CharField(max_length=150, blank=True)
+    path = models.CharField(max_length=2048)
+    route = models.CharField(max_length=255, blank=True)
+    http_method = models.CharField(max_length=10)
+    outcome = models.CharField(max_length=10, choices=OUTCOMES)
+    created_at = models.DateTimeField(default=timezone.now, db_index=True)
+
+    class Meta:
+        ordering = ('-created_at',)
+        verbose_name_plural = _('URL permission audit logs')
+        verbose_name = _('URL permission audit log')
+
+    def __str__(self):
+        return f"{self.outcome} {self.username} {self.http_method} {self.path}"
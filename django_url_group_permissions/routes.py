@@ -0,0 +1,91 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import logging
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+from .catalog import get_url_catalog
+from .models.models import UrlRoute
+
+logger = logging.getLogger(__name__)
+
+
+def sync_url_routes(routes=None, batch_size=500):
+    """
+    Make UrlRoute match the routes of the URLconf.
+
+    Routes missing from the URLconf are marked stale rather than deleted.
+    Returns a dict with the number of created, stale and revived routes.
+    """
+    if routes is None:
+        routes = get_url_catalog().urls
+    routes = set(routes)
+
+    with transaction.atomic():
+        existing = dict(UrlRoute.objects.values_list('route', 'is_stale'))
+        to_create = [UrlRoute(route=route) for route in routes if route not in existing]
+        stale = [route for route, is_stale in existing.items() if not is_stale and route not in routes]
+        revived = [route for route, is_stale in existing.items() if is_stale and route in routes]
+
+        UrlRoute.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+        for start in range(0, len(stale), batch_size):
+            UrlRoute.objects.filter(route__in=stale[start:start + batch_size]).update(is_stale=True)
+        for start in range(0, len(revived), batch_size):
+            UrlRoute.objects.filter(route__in=revived[start:start + batch_size]).update(is_stale=False)
+
+    return {
+        'created': len(to_create),
+        'stale': len(stale),
+        'revived': len(revived),
+    }
+
+
+def sync_routes_after_migrate(using=DEFAULT_DB_ALIAS, apps=global_apps, **kwargs):
+    """
+    post_migrate receiver, enabled by URL_PERMISSION_SYNC_ROUTES.
+
+    Skipped without a ROOT_URLCONF. A URLconf that fails to import only
+    logs a warning, it doesn't abort the migration.
+    """
+    if not getattr(settings, 'URL_PERMISSION_SYNC_ROUTES', True) or using != DEFAULT_DB_ALIAS:
+        return
+    if not getattr(settings, 'ROOT_URLCONF', None):
+        return
+    try:
+        apps.get_model('django_url_group_permissions', 'UrlRoute')
+    except LookupError:
+        # Migrated back before the route table
+        return
+    try:
+        sync_url_routes()
+    except Exception as e:
+        logger.warning(
+            'Could not sync URL routes after migrate, run sync_url_routes: %s', e,
+            exc_info=True,
+        )
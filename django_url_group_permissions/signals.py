@@ -0,0 +1,71 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from .matching import is_pattern
+from .models.models import GroupUrlPermissionMask, GroupUrlPermissions
+
+# Sent once the URL permission rules have changed and the change is committed.
+# Anything caching permission data in-process listens to this signal.
+url_permissions_changed = Signal()
+
+
+def send_url_permissions_changed():
+    url_permissions_changed.send(sender=GroupUrlPermissions)
+
+
+def notify_url_permissions_changed():
+    """
+    Send url_permissions_changed once the current transaction commits.
+
+    Bulk changes call this once per row; the signal is only sent once per
+    transaction.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block and any(
+        callback[1] is send_url_permissions_changed
+        for callback in connection.run_on_commit
+    ):
+        return
+    transaction.on_commit(send_url_permissions_changed)
+
+
+@receiver(post_save, sender=GroupUrlPermissions)
+@receiver(post_delete, sender=GroupUrlPermissions)
+@receiver(post_save, sender=GroupUrlPermissionMask)
+@receiver(post_delete, sender=GroupUrlPermissionMask)
+def url_permission_saved_or_deleted(sender, **kwargs):
+    notify_url_permissions_changed()
+
+
+@receiver(pre_save, sender=GroupUrlPermissions)
+@receiver(pre_save, sender=GroupUrlPermissionMask)
+def set_is_pattern(sender, instance, **kwargs):
+    # Also sent by loaddata, which skips save()
+    instance.is_pattern = is_pattern(instance.url)
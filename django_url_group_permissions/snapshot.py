@@ -0,0 +1,189 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import threading
+import time
+from types import MappingProxyType
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.dispatch import receiver
+
+from .cache import get_rules_version
+from .matching import UrlMatcher, is_pattern
+from .models.models import get_permission_model
+from .signals import url_permissions_changed
+
+
+class PermissionSnapshot:
+    """
+    Immutable in-memory index of the active URL permissions.
+
+    The index maps group id -> HTTP method -> frozenset of URLs. Wildcard
+    and route patterns go to a UrlMatcher whose values are
+    (group id, HTTP method) pairs. `version` is the shared rules version
+    the rows were loaded at, see cache.get_rules_version.
+    """
+
+    __slots__ = ('_index', '_patterns', 'version')
+
+    def __init__(self, rows, version=None):
+        self.version = version
+        index = {}
+        patterns = UrlMatcher()
+        for group_id, url, http_method in rows:
+            if is_pattern(url):
+                patterns.add(url, (group_id, http_method))
+            else:
+                index.setdefault(group_id, {}).setdefault(http_method, set()).add(url)
+        self._patterns = patterns
+        self._index = MappingProxyType({
+            group_id: MappingProxyType({
+                http_method: frozenset(urls)
+                for http_method, urls in methods.items()
+            })
+            for group_id, methods in index.items()
+        })
+
+    @classmethod
+    def load(cls):
+        """Build a snapshot from the active rows in the database."""
+        # Read the version first: a change committed while the rows are
+        # loaded bumps it, and the snapshot is stale from the start.
+        version = get_rules_version()
+        return cls(get_permission_model().active_grants(), version)
+
+    def has_url_permission(self, group_ids, url, method='GET'):
+        """
+        Check if any of the given groups may access the URL with given method.
+        """
+        if url.startswith('/'):
+            url = url[1:]
+
+        method = method.upper()
+        group_ids = list(group_ids)
+        for group_id in group_ids:
+            methods = self._index.get(group_id)
+            if not methods:
+                continue
+            if url in methods.get(method, ()) or url in methods.get('ALL', ()):
+                return True
+
+        if not self._patterns:
+            return False
+        matched = self._patterns.match(url)
+        return any(
+            (group_id, method) in matched or (group_id, 'ALL') in matched
+            for group_id in group_ids
+        )
+
+
+_lock = threading.Lock()
+_snapshot = None
+_generation = 0
+_checked_at = 0.0
+
+
+def _version_check_due():
+    """
+    Return True once every URL_PERMISSION_SNAPSHOT_CHECK_INTERVAL seconds.
+    None disables the check, 0 checks on every call.
+    """
+    global _checked_at
+    interval = getattr(settings, 'URL_PERMISSION_SNAPSHOT_CHECK_INTERVAL', 1.0)
+    if interval is None:
+        return False
+    now = time.monotonic()
+    if now - _checked_at < interval:
+        return False
+    _checked_at = now
+    return True
+
+
+def _drop_if_stale(snapshot):
+    """
+    Drop the snapshot if the shared rules version moved on, i.e. another
+    process changed the permissions. Returns True if it was dropped.
+    """
+    if get_rules_version() == snapshot.version:
+        return False
+    with _lock:
+        if _snapshot is snapshot:
+            invalidate_snapshot()
+    return True
+
+
+def get_snapshot():
+    """
+    Return the current snapshot, building it if needed.
+
+    Readers never take the lock once a snapshot is published; a rebuild
+    swaps in a fully built snapshot with a single assignment. At most once
+    per URL_PERMISSION_SNAPSHOT_CHECK_INTERVAL the snapshot is compared to
+    the shared rules version, so changes made in other processes are
+    picked up too.
+    """
+    global _snapshot
+    snapshot = _snapshot
+    if snapshot is not None and not (_version_check_due() and _drop_if_stale(snapshot)):
+        return snapshot
+
+    with _lock:
+        if _snapshot is not None:
+            return _snapshot
+        generation = _generation
+        snapshot = PermissionSnapshot.load()
+        # Only publish if no invalidation happened while we were loading,
+        # otherwise the next reader rebuilds from fresh data.
+        if generation == _generation:
+            _snapshot = snapshot
+        return snapshot
+
+
+async def aget_snapshot():
+    """Async version of get_snapshot; only a rebuild leaves the event loop."""
+    snapshot = _snapshot
+    if snapshot is not None and not _version_check_due():
+        return snapshot
+    return await sync_to_async(_aget_snapshot_checked)(snapshot)
+
+
+def _aget_snapshot_checked(snapshot):
+    if snapshot is not None and not _drop_if_stale(snapshot):
+        return snapshot
+    return get_snapshot()
+
+
+def invalidate_snapshot():
+    """Drop the current snapshot; the next reader rebuilds it."""
+    global _snapshot, _generation
+    _generation += 1
+    _snapshot = None
+
+
+@receiver(url_permissions_changed)
+def rebuild_snapshot_on_change(sender, **kwargs):
+    invalidate_snapshot()
@@ -0,0 +1,64 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from django import template
+
+from ..utils import check_url_permissions
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def url_permissions(context, *urls, method='GET'):
+    """
+    Check several URLs at once and return a dict of url -> bool.
+
+        {% url_permissions '/reports/' '/billing/' as allowed %}
+        {% if allowed|get_item:'/reports/' %}...{% endif %}
+
+    The user's permissions are loaded once per request, see
+    utils.check_url_permissions.
+    """
+    decisions = check_url_permissions(context['request'], [(url, method) for url in urls])
+    return {url: decisions[(url, method.upper())] for url in urls}
+
+
+@register.filter
+def can_access(request, url):
+    """
+    Return True if the request user may GET the URL.
+
+        {% if request|can_access:'/reports/' %}...{% endif %}
+
+    Only the first check of the request loads the user's permissions.
+    """
+    return check_url_permissions(request, [(url, 'GET')])[(url, 'GET')]
+
+
+@register.filter
+def get_item(mapping, key):
+    """Look up a key such as a URL that can't be used with dot notation."""
+    return mapping.get(key)
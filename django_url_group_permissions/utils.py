@@ -0,0 +1,76 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from .engines import get_engine
+
+
+def get_request_group_ids(request):
+    """Return the ids of the request user's groups, memoized on the request."""
+    group_ids = getattr(request, '_url_permission_group_ids', None)
+    if group_ids is None:
+        group_ids = request._url_permission_group_ids = frozenset(
+            request.user.groups.values_list('id', flat=True)
+        )
+    return group_ids
+
+
+def get_request_permissions(request):
+    """
+    Return the request user's permissions from the configured engine,
+    loaded on first use and memoized on the request.
+    """
+    permissions = getattr(request, '_url_permission_grants', None)
+    if permissions is None:
+        engine = get_engine()
+        group_ids = get_request_group_ids(request) if engine.needs_group_ids else None
+        permissions = request._url_permission_grants = engine.get_user_permissions(request.user, group_ids)
+    return permissions
+
+
+def check_url_permissions(request, checks):
+    """
+    Check many (url, method) pairs for the request user.
+
+    Decisions are memoized on the request. The first check loads the
+    user's permissions from the configured engine, at most one query, and
+    every later check in the request is answered from memory.
+    """
+    decisions = getattr(request, '_url_permission_decisions', None)
+    if decisions is None:
+        decisions = request._url_permission_decisions = {}
+
+    checks = [(url, method.upper()) for url, method in checks]
+    missing = [check for check in checks if check not in decisions]
+    if missing:
+        user = request.user
+        if not user.is_authenticated:
+            decisions.update((check, False) for check in missing)
+        elif user.is_superuser:
+            decisions.update((check, True) for check in missing)
+        else:
+            permissions = get_request_permissions(request)
+            decisions.update((check, permissions.allows(*check)) for check in missing)
+    return {check: decisions[check] for check in checks}
@@ -0,0 +1,180 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+"""
+Warm a process up before it serves traffic.
+
+The first requests of a new worker otherwise pay for importing the
+URLconf, populating the resolver, building the URL catalog and loading
+the permission data of the configured engine.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.urls import get_resolver
+
+from .catalog import get_url_catalog
+
+logger = logging.getLogger(__name__)
+
+
+def warm_resolver():
+    resolver = get_resolver()
+    # Imports the URLconf and builds the reverse lookup tables
+    resolver.reverse_dict
+
+
+def warm_database():
+    connections['default'].ensure_connection()
+
+
+def warm_engine():
+    engine = getattr(settings, 'URL_PERMISSION_ENGINE', 'database')
+    if engine == 'snapshot':
+        from .snapshot import get_snapshot
+        get_snapshot()
+    elif engine == 'bundle':
+        from .bundle import get_bundle
+        get_bundle()
+    elif engine == 'cache':
+        from .cache import get_rules_version
+        get_rules_version()
+
+
+STEPS = (
+    ('urlconf', warm_resolver),
+    ('catalog', get_url_catalog),
+    ('database', warm_database),
+    ('engine', warm_engine),
+)
+
+
+class WarmupReport:
+    """The duration and status ('ok', 'failed' or 'skipped') of each step."""
+
+    def __init__(self):
+        self.steps = []
+
+    def add(self, name, seconds, status):
+        self.steps.append((name, seconds, status))
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds, _ in self.steps)
+
+    def __str__(self):
+        steps = ', '.join(
+            f'{name} {seconds * 1000:.1f}ms' + ('' if status == 'ok' else f' ({status})')
+            for name, seconds, status in self.steps
+        )
+        return f'URL permission warmup: {steps}; total {self.total * 1000:.1f}ms'
+
+
+def warmup(budget=None, close_connections=False):
+    """
+    Run the warmup steps in order and return a WarmupReport.
+
+    Steps are not interrupted, but once `budget` seconds
+    (URL_PERMISSION_WARMUP_BUDGET by default) are spent the remaining ones
+    are skipped. A failing step is logged and doesn't stop the others.
+    Pass close_connections=True before forking, so workers don't share the
+    database connections opened here.
+    """
+    if budget is None:
+        budget = getattr(settings, 'URL_PERMISSION_WARMUP_BUDGET', 5.0)
+    report = WarmupReport()
+    start = time.perf_counter()
+    try:
+        for name, step in STEPS:
+            if budget is not None and time.perf_counter() - start >= budget:
+                report.add(name, 0.0, 'skipped')
+                continue
+            step_start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning('URL permission warmup step %r failed: %s', name, e)
+                status = 'failed'
+            else:
+                status = 'ok'
+            report.add(name, time.perf_counter() - step_start, status)
+    finally:
+        if close_connections:
+            connections.close_all()
+    logger.info('%s', report)
+    return report
+
+
+_lock = threading.Lock()
+_report = None
+
+
+def warmup_once(**kwargs):
+    """
+    Run warmup() the first time it is called in the process and return its
+    report. Forked workers inherit both the warmed data and the report.
+
+    ASGI handlers load middleware inside the event loop, where the ORM
+    refuses to run; the warmup then runs in a thread of its own.
+    """
+    global _report
+    with _lock:
+        if _report is None:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                _report = warmup(**kwargs)
+            else:
+                result = []
+                thread = threading.Thread(
+                    target=lambda: result.append(warmup(**kwargs)),
+                    name='url-permission-warmup',
+                )
+                thread.start()
+                thread.join()
+                _report = result[0] if result else None
+    return _report
+
+
+def warmup_worker(*args, **kwargs):
+    """
+    Warm up a gunicorn worker. Takes any hook arguments, so it works as
+    post_worker_init(worker) or post_fork(server, worker):
+
+        # gunicorn.conf.py
+        from django_url_group_permissions.warmup import warmup_worker
+        post_worker_init = warmup_worker
+    """
+    from django.apps import apps
+    if not apps.ready:
+        import django
+        django.setup(set_prefix=False)
+    return warmup()
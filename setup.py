@@ -19,25 +19,24 @@ setup(
     classifiers=[
         "Development Status :: 3 - Alpha",  # Package maturity
         "Framework :: Django",
-        "Framework :: Django :: 3.2",  # Django version compatibility
-        "Framework :: Django :: 4.0",
+        "Framework :: Django :: 4.1",  # Django version compatibility
+        "Framework :: Django :: 4.2",
         "Intended Audience :: Developers",
         "License :: OSI Approved :: MIT License",  # License
         "Operating System :: OS Independent",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Programming Language :: Python :: 3.9",
         "Programming Language :: Python :: 3.10",
         "Topic :: Internet :: WWW/HTTP",
         "Topic :: Security",
     ],
-    packages=find_packages(),  # Automatically find packages in the directory
+    packages=find_packages(exclude=["tests", "tests.*"]),  # Automatically find packages in the directory
     include_package_data=True,  # Include non-Python files (e.g., templates, static files)
-    python_requires=">=3.7",  # Python version requirement
+    python_requires=">=3.8",  # Python version requirement
     install_requires=[
-        "Django>=3.2",  # Django dependency
+        "Django>=4.1",  # Django dependency; the async ORM needs 4.1
     ],
     extras_require={
         "dev": [
@@ -0,0 +1,59 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import pytest
+from django.contrib.auth.models import Group, User
+
+from django_url_group_permissions.cache import get_cache
+from django_url_group_permissions.snapshot import invalidate_snapshot
+
+
+@pytest.fixture(autouse=True)
+def fresh_permission_data():
+    """
+    Drop the in-process permission data. Test transactions are rolled back
+    without running the on_commit callbacks that would invalidate it.
+    """
+    invalidate_snapshot()
+    get_cache().clear()
+
+
+@pytest.fixture
+def group(db):
+    return Group.objects.create(name='staff')
+
+
+@pytest.fixture
+def user(group):
+    user = User.objects.create_user('member', password='password')
+    user.groups.add(group)
+    return user
+
+
+@pytest.fixture
+def member_client(client, user):
+    client.force_login(user)
+    return client
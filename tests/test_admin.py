@@ -0,0 +1,291 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from types import SimpleNamespace
+
+import pytest
+from django.contrib.admin import site
+from django.contrib.auth.models import Group
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from django_url_group_permissions import admin as permissions_admin, signals
+from django_url_group_permissions.admin import EstimatedCountPaginator, estimate_count, save_group_url_permissions
+from django_url_group_permissions.catalog import get_url_catalog
+from django_url_group_permissions.models import GroupUrlPermissionMask, GroupUrlPermissions
+
+pytestmark = pytest.mark.django_db
+
+CHOSEN = {(f'reports/{i}/', 'GET') for i in range(1000)}
+
+
+def test_save_creates_rows_in_batches(group):
+    with CaptureQueriesContext(connection) as queries:
+        assert save_group_url_permissions(group, CHOSEN) == (1000, 0)
+
+    assert GroupUrlPermissions.objects.filter(group=group).count() == 1000
+    # One INSERT per row before the diff-based save
+    assert len(queries) < 50
+
+
+def test_unchanged_save_only_reads(group, django_assert_num_queries):
+    save_group_url_permissions(group, CHOSEN)
+
+    # SAVEPOINT, the SELECT of the existing rows and RELEASE SAVEPOINT
+    with django_assert_num_queries(3):
+        assert save_group_url_permissions(group, CHOSEN) == (0, 0)
+
+
+def test_save_queries_dont_depend_on_unchanged_rows(group):
+    save_group_url_permissions(group, CHOSEN)
+    counts = []
+    for added in ('new/', 'newer/'):
+        with CaptureQueriesContext(connection) as queries:
+            save_group_url_permissions(group, CHOSEN | {(added, 'POST')})
+        counts.append(len(queries))
+        save_group_url_permissions(group, CHOSEN)
+
+    small = {('reports/1/', 'GET')}
+    save_group_url_permissions(group, small)
+    with CaptureQueriesContext(connection) as queries:
+        save_group_url_permissions(group, small | {('new/', 'POST')})
+    assert counts == [len(queries)] * 2
+
+
+def test_save_keeps_unchanged_rows(group):
+    save_group_url_permissions(group, {('reports/', 'GET'), ('old/', 'GET')})
+    kept = GroupUrlPermissions.objects.get(url='reports/')
+    GroupUrlPermissions.objects.filter(pk=kept.pk).update(is_active=False, description='Quarterly')
+
+    assert save_group_url_permissions(group, {('reports/', 'GET'), ('new/', 'POST')}) == (1, 1)
+
+    row = GroupUrlPermissions.objects.get(url='reports/')
+    assert (row.pk, row.created_at, row.is_active, row.description) == (
+        kept.pk, kept.created_at, False, 'Quarterly',
+    )
+    assert set(GroupUrlPermissions.objects.values_list('url', 'http_method')) == {
+        ('reports/', 'GET'), ('new/', 'POST'),
+    }
+
+
+def test_save_bitmask_updates_methods(group, settings):
+    settings.URL_PERMISSION_STORAGE = 'bitmask'
+    save_group_url_permissions(group, {('reports/', 'GET'), ('old/', 'GET')})
+    kept = GroupUrlPermissionMask.objects.get(url='reports/')
+
+    assert save_group_url_permissions(group, {('reports/', 'GET'), ('reports/', 'POST')}) == (0, 1)
+
+    row = GroupUrlPermissionMask.objects.get()
+    assert (row.pk, row.created_at, row.http_methods) == (kept.pk, kept.created_at, ['GET', 'POST'])
+
+
+def test_admin_saves_diff(admin_client, group):
+    save_group_url_permissions(group, {('reports/', 'GET'), ('old/', 'GET')})
+
+    response = admin_client.post(
+        reverse('admin:auth_group_change', args=[group.pk]),
+        {'name': group.name, 'url_permissions': ['reports/|GET', 'new/|DELETE']},
+    )
+
+    assert response.status_code == 302
+    assert set(GroupUrlPermissions.objects.values_list('url', 'http_method')) == {
+        ('reports/', 'GET'), ('new/', 'DELETE'),
+    }
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('reports get', {('reports/', 'GET')}),
+    ('items/ delete', {('items/<int:pk>/', 'DELETE')}),
+    ('nothing-matches', set()),
+])
+def test_admin_expands_choose_all_on_save(admin_client, group, term, expected):
+    response = admin_client.post(
+        reverse('admin:auth_group_change', args=[group.pk]),
+        {'name': group.name, 'url_permissions': ['new/|PUT'], 'url_permissions_matching': [term]},
+    )
+
+    assert response.status_code == 302
+    assert set(GroupUrlPermissions.objects.values_list('url', 'http_method')) == expected | {('new/', 'PUT')}
+
+
+def test_admin_choose_all_without_filter_takes_whole_catalog(admin_client, group):
+    admin_client.post(
+        reverse('admin:auth_group_change', args=[group.pk]),
+        {'name': group.name, 'url_permissions_matching': ['']},
+    )
+
+    assert set(GroupUrlPermissions.objects.values_list('url', 'http_method')) == {
+        (entry['url'], entry['http_method']) for entry in get_url_catalog().search()
+    }
+
+
+def test_autocomplete_pages_through_catalog(admin_client):
+    url = reverse('admin:auth_group_url_permissions_autocomplete')
+
+    first = admin_client.get(url, {'term': 'reports'}).json()
+    assert [entry['id'] for entry in first['results']] == [
+        f'reports/|{method}' for method in ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS', 'ALL')
+    ]
+    assert first['more'] is False
+    assert admin_client.get(url, {'term': 'reports', 'page': 2}).json() == {'results': [], 'more': False}
+
+
+@pytest.mark.parametrize('storage, active, inactive', [
+    ('rows', GroupUrlPermissions, GroupUrlPermissionMask),
+    ('bitmask', GroupUrlPermissionMask, GroupUrlPermissions),
+])
+def test_inactive_storage_is_read_only(admin_client, settings, group, storage, active, inactive):
+    settings.URL_PERMISSION_STORAGE = storage
+    if inactive is GroupUrlPermissions:
+        row = inactive.objects.create(group=group, url='reports/', http_method='GET')
+    else:
+        row = inactive.objects.create(group=group, url='reports/', methods=1)
+
+    def admin_url(model, view, *args):
+        return reverse(f'admin:django_url_group_permissions_{model._meta.model_name}_{view}', args=args)
+
+    assert admin_client.get(admin_url(active, 'add')).status_code == 200
+    assert admin_client.get(admin_url(inactive, 'add')).status_code == 403
+    assert admin_client.get(admin_url(inactive, 'changelist')).status_code == 200
+    response = admin_client.post(admin_url(inactive, 'change', row.pk), {'url': 'changed/'})
+    assert response.status_code == 403
+    assert inactive.objects.get().url == 'reports/'
+
+
+@pytest.fixture
+def estimates(monkeypatch):
+    estimates = SimpleNamespace(value=None, models=[])
+
+    def estimate(model, using):
+        estimates.models.append(model)
+        return estimates.value
+
+    monkeypatch.setattr(permissions_admin, 'estimate_count', estimate)
+    return estimates
+
+
+@pytest.mark.parametrize('estimate, expected', [
+    (None, 3),
+    (9999, 3),
+    (10000, 10000),
+    (2500000, 2500000),
+])
+def test_paginator_estimates_unfiltered_count(group, estimates, estimate, expected):
+    for url in ('a/', 'b/', 'c/'):
+        GroupUrlPermissions.objects.create(group=group, url=url, http_method='GET')
+    estimates.value = estimate
+
+    paginator = EstimatedCountPaginator(GroupUrlPermissions.objects.all(), 100)
+
+    assert paginator.count == expected
+    assert estimates.models == [GroupUrlPermissions]
+
+
+def test_paginator_counts_filtered_queryset_exactly(group, estimates, django_assert_num_queries):
+    GroupUrlPermissions.objects.create(group=group, url='a/', http_method='GET')
+    GroupUrlPermissions.objects.create(group=group, url='b/', http_method='GET')
+    estimates.value = 2500000
+
+    paginator = EstimatedCountPaginator(GroupUrlPermissions.objects.filter(url='a/'), 100)
+
+    with django_assert_num_queries(1):
+        assert paginator.count == 1
+    assert estimates.models == []
+
+
+def test_estimate_count_without_statistics():
+    # SQLite keeps no row estimate, so the paginator falls back to COUNT(*)
+    assert estimate_count(GroupUrlPermissions, 'default') is None
+
+
+@pytest.mark.parametrize('term, expected', [
+    ('', ['items/', 'reports/', 'reports/2/']),
+    ('reports/', ['reports/', 'reports/2/']),
+    ('/reports/', ['reports/', 'reports/2/']),
+    ('  /reports/2  ', ['reports/2/']),
+    ('ports', []),
+    ('auditors', ['items/']),
+    ('audit', []),
+])
+def test_search_matches_url_prefix_and_group_name(group, term, expected):
+    auditors = Group.objects.create(name='auditors')
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    GroupUrlPermissions.objects.create(group=group, url='reports/2/', http_method='GET')
+    GroupUrlPermissions.objects.create(group=auditors, url='items/', http_method='GET')
+    model_admin = site._registry[GroupUrlPermissions]
+
+    queryset, may_have_duplicates = model_admin.get_search_results(
+        None, GroupUrlPermissions.objects.all(), term,
+    )
+
+    assert sorted(queryset.values_list('url', flat=True)) == expected
+    assert may_have_duplicates is False
+
+
+@pytest.mark.parametrize('model, action, is_active', [
+    (GroupUrlPermissions, 'deactivate_permissions', False),
+    (GroupUrlPermissions, 'activate_permissions', True),
+    (GroupUrlPermissionMask, 'deactivate_permissions', False),
+    (GroupUrlPermissionMask, 'activate_permissions', True),
+])
+def test_actions_run_one_update(
+    admin_client, settings, group, monkeypatch, django_capture_on_commit_callbacks, model, action, is_active,
+):
+    if model is GroupUrlPermissionMask:
+        settings.URL_PERMISSION_STORAGE = 'bitmask'
+        rows = [model.objects.create(group=group, url=f'{i}/', methods=1, is_active=not is_active) for i in range(5)]
+    else:
+        rows = [model.objects.create(group=group, url=f'{i}/', http_method='GET', is_active=not is_active) for i in range(5)]
+    notifications = []
+    monkeypatch.setattr(signals, 'send_url_permissions_changed', lambda: notifications.append(1))
+
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        response = admin_client.post(
+            reverse(f'admin:django_url_group_permissions_{model._meta.model_name}_changelist'),
+            {'action': action, '_selected_action': [row.pk for row in rows[:3]]},
+        )
+
+    assert response.status_code == 302
+    updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE')]
+    assert len(updates) == 1
+    assert list(model.objects.order_by('url').values_list('is_active', flat=True)) == [is_active] * 3 + [not is_active] * 2
+    assert notifications == [1]
+
+
+def test_action_without_changes_does_not_notify(admin_client, group, monkeypatch, django_capture_on_commit_callbacks):
+    row = GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    GroupUrlPermissions.objects.filter(pk=row.pk).delete()
+    notifications = []
+    monkeypatch.setattr(signals, 'send_url_permissions_changed', lambda: notifications.append(1))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        admin_client.post(
+            reverse('admin:django_url_group_permissions_groupurlpermissions_changelist'),
+            {'action': 'deactivate_permissions', '_selected_action': [row.pk]},
+        )
+
+    assert notifications == []
@@ -0,0 +1,76 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import pytest
+from django.contrib.auth.models import User
+
+from django_url_group_permissions import audit
+from django_url_group_permissions.instrumentation import DENY, Decision
+from django_url_group_permissions.models import UrlPermissionAuditLog
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def record(self, record):
+        self.records.append(record)
+
+
+@pytest.fixture
+def audit_logger(monkeypatch):
+    logger = RecordingLogger()
+    monkeypatch.setattr(audit, 'get_audit_logger', lambda: logger)
+    return logger
+
+
+def test_audit_record_fits_columns(audit_logger):
+    user = User(pk=1, username='member')
+    decision = Decision(
+        DENY, 'reports/', 'PROPFIND-EXTENDED', '/reports/' + 'x' * 3000, user, {}, 0.0, None,
+    )
+
+    audit.audit_hook(None, decision)
+
+    record, = audit_logger.records
+    for field in ('username', 'path', 'route', 'http_method'):
+        max_length = UrlPermissionAuditLog._meta.get_field(field).max_length
+        assert len(record[field]) <= max_length
+    assert record['http_method'] == 'PROPFIND-E'
+
+
+@pytest.mark.django_db
+def test_audit_logger_writes_batch():
+    logger = audit.AuditLogger()
+    record = {
+        'user_id': None, 'username': '', 'path': '/reports/', 'route': 'reports/',
+        'http_method': 'GET', 'outcome': DENY,
+    }
+
+    logger.write([record, dict(record, path='/other/')])
+
+    assert logger.written == 2
+    assert sorted(UrlPermissionAuditLog.objects.values_list('path', flat=True)) == ['/other/', '/reports/']
@@ -0,0 +1,76 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import os
+import stat
+
+import pytest
+
+from django_url_group_permissions.bundle import BundleError, PermissionBundle, write_bundle
+
+
+@pytest.fixture
+def umask_022():
+    umask = os.umask(0o022)
+    yield
+    os.umask(umask)
+
+
+def test_bundle_answers_checks(tmp_path):
+    path = str(tmp_path / 'permissions.bundle')
+    write_bundle(path, [(1, '/reports/', 'GET'), (2, 'items/<int:pk>/', 'ALL')])
+
+    bundle = PermissionBundle(path)
+    assert bundle.has_url_permission([1], 'reports/', 'GET')
+    assert not bundle.has_url_permission([1], 'reports/', 'POST')
+    assert bundle.has_url_permission([2], '/items/7/', 'DELETE')
+    assert not bundle.has_url_permission([1], 'items/7/', 'GET')
+    bundle.close()
+
+
+def test_bundle_is_readable_by_other_users(tmp_path, umask_022):
+    path = str(tmp_path / 'permissions.bundle')
+    write_bundle(path, [(1, 'reports/', 'GET')])
+
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o644
+
+
+@pytest.mark.parametrize('content', [b'', b'UGPB', b'not a bundle' * 10])
+def test_invalid_bundle_raises_bundle_error(tmp_path, content):
+    path = tmp_path / 'permissions.bundle'
+    path.write_bytes(content)
+
+    with pytest.raises(BundleError):
+        PermissionBundle(str(path))
+
+
+def test_truncated_bundle_raises_bundle_error(tmp_path):
+    path = tmp_path / 'permissions.bundle'
+    write_bundle(str(path), [(1, f'reports/{i}/', 'GET') for i in range(10)])
+    path.write_bytes(path.read_bytes()[:-20])
+
+    with pytest.raises(BundleError, match='truncated'):
+        PermissionBundle(str(path))
@@ -0,0 +1,237 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+from types import SimpleNamespace
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_logged_out
+from django.core import signing
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from django_url_group_permissions import claims as claims_module
+from django_url_group_permissions.claims import (
+    PermissionClaims, aread_claims, issue_claims, read_claims, set_claims_cookie,
+)
+from django_url_group_permissions.middleware import UrlPermissionMiddleware
+from django_url_group_permissions.models import GroupUrlPermissions
+
+pytestmark = pytest.mark.django_db
+
+HEADER = 'HTTP_X_URL_PERMISSIONS'
+
+
+@pytest.fixture
+def claims_settings(settings):
+    settings.URL_PERMISSION_CLAIMS = True
+    return settings
+
+
+def request_with(token):
+    return RequestFactory().get('/reports/', **{HEADER: token})
+
+
+def tamper(token):
+    # Change one character of the signed payload
+    index = len(token) // 3
+    return token[:index] + ('A' if token[index] != 'A' else 'B') + token[index + 1:]
+
+
+def test_current_claims_are_read_without_queries(user, group, django_assert_num_queries):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    request = request_with(issue_claims(user))
+
+    with django_assert_num_queries(0):
+        claims = read_claims(request, user)
+
+    assert claims.user_id == user.pk
+    assert claims.allows('/reports/', 'GET')
+    assert not claims.allows('/reports/', 'POST')
+
+
+def test_claims_cookie_is_read(user):
+    request = RequestFactory().get('/reports/')
+    request.COOKIES['url_permissions'] = issue_claims(user)
+
+    assert read_claims(request, user) is not None
+
+
+def test_missing_token(user):
+    assert read_claims(RequestFactory().get('/reports/'), user) is None
+
+
+def test_token_of_another_user(user):
+    other = User.objects.create_user('other')
+
+    assert read_claims(request_with(issue_claims(other)), user) is None
+
+
+def test_tampered_token(user):
+    token = issue_claims(user)
+
+    assert read_claims(request_with(tamper(token)), user) is None
+    assert read_claims(request_with('not-a-token'), user) is None
+
+
+def test_expired_token(user, settings, monkeypatch):
+    settings.URL_PERMISSION_CLAIMS_MAX_AGE = 60
+    now = signing.time.time()
+    monkeypatch.setattr(signing, 'time', SimpleNamespace(time=lambda: now - 61))
+    token = issue_claims(user)
+    monkeypatch.setattr(signing, 'time', SimpleNamespace(time=lambda: now))
+
+    assert read_claims(request_with(token), user) is None
+    settings.URL_PERMISSION_CLAIMS_MAX_AGE = 120
+    assert read_claims(request_with(token), user) is not None
+
+
+def test_stale_rules_version(user, group, django_capture_on_commit_callbacks):
+    request = request_with(issue_claims(user))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+
+    assert read_claims(request, user) is None
+
+
+def test_group_change_resets_user_stamp(user, group, django_capture_on_commit_callbacks):
+    other = User.objects.create_user('other')
+    other.groups.add(group)
+    request = request_with(issue_claims(user))
+    other_request = request_with(issue_claims(other))
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.groups.remove(group)
+
+    assert read_claims(request, user) is None
+    # Only the user whose groups changed
+    assert read_claims(other_request, other) is not None
+
+
+def test_aread_claims(user, group, django_capture_on_commit_callbacks):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    token = issue_claims(user)
+    other = User.objects.create_user('other')
+
+    claims = async_to_sync(aread_claims)(request_with(token), user)
+    assert claims.allows('reports/', 'GET')
+    assert async_to_sync(aread_claims)(request_with(tamper(token)), user) is None
+    assert async_to_sync(aread_claims)(request_with(token), other) is None
+    assert async_to_sync(aread_claims)(RequestFactory().get('/reports/'), user) is None
+
+    with django_capture_on_commit_callbacks(execute=True):
+        user.groups.remove(group)
+    assert async_to_sync(aread_claims)(request_with(token), user) is None
+
+
+@pytest.mark.parametrize('url, method, allowed', [
+    ('reports/', 'GET', True),
+    ('/reports/', 'get', True),
+    ('reports/', 'POST', False),
+    ('items/3/', 'DELETE', True),
+    ('items/3/', 'PATCH', True),
+    ('items/x/', 'GET', False),
+    ('open/', 'GET', False),
+])
+def test_claims_allow_exact_urls_and_patterns(user, group, url, method, allowed):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    GroupUrlPermissions.objects.create(group=group, url='items/<int:pk>/', http_method='ALL')
+    claims = read_claims(request_with(issue_claims(user)), user)
+
+    assert claims.allows(url, method) is allowed
+
+
+def test_claims_without_patterns_key(user, group):
+    # Tokens issued before the patterns key was added
+    GroupUrlPermissions.objects.create(group=group, url='items/*/', http_method='GET')
+    payload = signing.loads(issue_claims(user), salt=claims_module.SALT)
+    del payload['k']
+
+    assert PermissionClaims(payload).allows('items/3/', 'GET')
+
+
+def test_invalid_token_is_reissued(member_client, claims_settings, group):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+
+    response = member_client.get('/reports/', **{HEADER: 'not-a-token'})
+
+    assert response.status_code == 200
+    token = response['X-Url-Permissions']
+    assert response.cookies['url_permissions'].value == token
+    claims = read_claims(request_with(token), response.wsgi_request.user)
+    assert claims.allows('/reports/', 'GET')
+
+
+def test_current_token_decides_without_permission_query(
+    member_client, claims_settings, user, group, django_assert_num_queries,
+):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    token = issue_claims(user)
+
+    # Session and user only
+    with django_assert_num_queries(2):
+        response = member_client.get('/reports/', **{HEADER: token})
+
+    assert response.status_code == 200
+    assert not response.has_header('X-Url-Permissions')
+
+
+def test_no_token_is_not_issued(member_client, claims_settings):
+    response = member_client.get('/reports/')
+
+    assert not response.has_header('X-Url-Permissions')
+    assert 'url_permissions' not in response.cookies
+
+
+def test_logout_deletes_cookie(claims_settings, user):
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+    request = RequestFactory().post('/logout/')
+
+    user_logged_out.send(sender=User, request=request, user=user)
+    response = middleware.process_response(request, HttpResponse())
+
+    assert request.url_permission_claims == ''
+    cookie = response.cookies['url_permissions']
+    assert cookie.value == ''
+    assert cookie['max-age'] == 0
+    assert not response.has_header('X-Url-Permissions')
+
+
+def test_logout_view_deletes_cookie(admin_client, claims_settings):
+    response = admin_client.post('/admin/logout/')
+
+    assert response.cookies['url_permissions']['max-age'] == 0
+
+
+def test_large_token_is_only_sent_in_header():
+    response = HttpResponse()
+
+    set_claims_cookie(response, 'x' * 4000)
+
+    assert response['X-Url-Permissions'] == 'x' * 4000
+    assert 'url_permissions' not in response.cookies
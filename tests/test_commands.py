@@ -0,0 +1,238 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import io
+import json
+
+import pytest
+from django.contrib.auth.models import Group, User
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from django_url_group_permissions import signals
+from django_url_group_permissions.management.commands.report_url_permissions import METHODS
+from django_url_group_permissions.management.commands.report_url_permissions import Command as ReportCommand
+from django_url_group_permissions.models import GroupUrlPermissionMask, GroupUrlPermissions, collapse_grants
+
+pytestmark = pytest.mark.django_db
+
+
+def write_jsonl(tmp_path, records):
+    path = tmp_path / 'permissions.jsonl'
+    path.write_text(''.join(json.dumps(record) + '\n' for record in records))
+    return str(path)
+
+
+def test_import_normalises_url_and_method(tmp_path, user, group):
+    path = write_jsonl(tmp_path, [
+        {'group': group.name, 'url': '/reports/', 'http_method': 'get'},
+        {'group': group.name, 'url': 'items/<int:pk>/', 'http_method': ' Post '},
+    ])
+
+    call_command('import_url_permissions', path, stdout=io.StringIO())
+
+    assert set(GroupUrlPermissions.objects.values_list('url', 'http_method')) == {
+        ('reports/', 'GET'), ('items/<int:pk>/', 'POST'),
+    }
+    assert GroupUrlPermissions.has_url_permission(user, '/reports/', 'GET')
+
+
+def test_import_rejects_unknown_method_with_line_number(tmp_path, group):
+    path = write_jsonl(tmp_path, [
+        {'group': group.name, 'url': 'reports/', 'http_method': 'GET'},
+        {'group': group.name, 'url': 'reports/', 'http_method': 'FETCH'},
+    ])
+
+    with pytest.raises(CommandError, match="line 2: unknown HTTP method 'FETCH'"):
+        call_command('import_url_permissions', path, stdout=io.StringIO())
+    assert not GroupUrlPermissions.objects.exists()
+
+
+def test_import_csv_reports_file_line(tmp_path, group):
+    path = tmp_path / 'permissions.csv'
+    path.write_text(f'group,url,http_method\n{group.name},reports/,GET\n{group.name},open/,BREW\n')
+
+    with pytest.raises(CommandError, match='line 3'):
+        call_command('import_url_permissions', str(path), stdout=io.StringIO())
+
+
+def test_export_import_round_trip(tmp_path, group):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='ALL', description='All')
+    path = str(tmp_path / 'permissions.jsonl')
+    call_command('export_url_permissions', path)
+    GroupUrlPermissions.objects.all().delete()
+
+    call_command('import_url_permissions', path, stdout=io.StringIO())
+
+    assert list(GroupUrlPermissions.objects.values_list('url', 'http_method', 'description')) == [
+        ('reports/', 'ALL', 'All'),
+    ]
+
+
+def test_collapse_grants():
+    rows = [
+        (1, 'reports/', 'GET', True, None),
+        (1, 'reports/', 'POST', True, 'Reports'),
+        (1, 'reports/', 'DELETE', False, None),
+        (1, 'old/', 'GET', False, None),
+        (1, 'old/', 'PUT', False, 'Old'),
+        (2, 'reports/', 'ALL', True, None),
+    ]
+
+    assert sorted(collapse_grants(rows)) == [
+        (1, 'old/', 0b101, False, 'Old'),
+        (1, 'reports/', 0b11, True, 'Reports'),
+        (2, 'reports/', 0b10000000, True, None),
+    ]
+
+
+def test_import_collapses_into_bitmask(tmp_path, settings, group):
+    settings.URL_PERMISSION_STORAGE = 'bitmask'
+    path = write_jsonl(tmp_path, [
+        {'group': group.name, 'url': 'reports/', 'http_method': 'GET'},
+        {'group': group.name, 'url': 'open/', 'http_method': 'GET'},
+        {'group': group.name, 'url': 'reports/', 'http_method': 'POST'},
+    ])
+
+    call_command('import_url_permissions', path, stdout=io.StringIO())
+
+    assert dict(GroupUrlPermissionMask.objects.values_list('url', 'methods')) == {'reports/': 0b11, 'open/': 0b1}
+
+
+def test_convert_deletes_without_loading_rows(group, monkeypatch, django_capture_on_commit_callbacks):
+    GroupUrlPermissionMask.objects.create(group=group, url='stale/', methods=1)
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='POST', is_active=False)
+    notifications = []
+    monkeypatch.setattr(signals, 'send_url_permissions_changed', lambda: notifications.append(1))
+
+    with CaptureQueriesContext(connection) as queries, django_capture_on_commit_callbacks(execute=True):
+        call_command('convert_url_permissions_storage', 'bitmask', stdout=io.StringIO())
+
+    table = GroupUrlPermissionMask._meta.db_table
+    statements = [query['sql'].split()[0] for query in queries.captured_queries if table in query['sql']]
+    # One DELETE of the whole table, then the new rows
+    assert statements == ['DELETE', 'INSERT']
+    assert list(GroupUrlPermissionMask.objects.values_list('url', 'methods', 'is_active')) == [('reports/', 1, True)]
+    assert notifications == [1]
+
+
+def report_options(**options):
+    return {'include_inactive': False, 'users': None, 'groups': None, 'chunk_size': 1, **options}
+
+
+@pytest.fixture
+def report_users(group):
+    auditors = Group.objects.create(name='auditors')
+    users = {}
+    for username, groups, is_active in [
+        ('alice', [], True),
+        ('bob', [group, auditors], True),
+        ('carol', [], True),
+        ('dave', [group], True),
+        ('erin', [auditors], False),
+    ]:
+        users[username] = User.objects.create_user(username, is_active=is_active)
+        users[username].groups.set(groups)
+    return {'staff': group.pk, 'auditors': auditors.pk}
+
+
+@pytest.mark.parametrize('options, expected', [
+    ({}, [('alice', []), ('bob', ['auditors', 'staff']), ('carol', []), ('dave', ['staff'])]),
+    ({'include_inactive': True}, [
+        ('alice', []), ('bob', ['auditors', 'staff']), ('carol', []), ('dave', ['staff']), ('erin', ['auditors']),
+    ]),
+    # Members keep all their groups, not only the filtered one
+    ({'groups': ['auditors']}, [('bob', ['auditors', 'staff'])]),
+    ({'groups': ['auditors'], 'include_inactive': True}, [('bob', ['auditors', 'staff']), ('erin', ['auditors'])]),
+    ({'users': ['carol', 'dave']}, [('carol', []), ('dave', ['staff'])]),
+    ({'users': ['alice', 'bob'], 'groups': ['staff']}, [('bob', ['auditors', 'staff'])]),
+    ({'users': ['nobody']}, []),
+])
+def test_report_iter_users_merges_memberships(report_users, options, expected):
+    names = {pk: name for name, pk in report_users.items()}
+
+    rows = list(ReportCommand().iter_users(report_options(**options)))
+
+    assert [(username, sorted(names[pk] for pk in group_ids)) for username, _, group_ids in rows] == expected
+    assert not any(is_superuser for _, is_superuser, _ in rows)
+
+
+def test_report_group_bits(group):
+    auditors = Group.objects.create(name='auditors')
+    routes = ['items/<int:pk>/', 'open/', 'reports/']
+    GroupUrlPermissions.objects.bulk_create([
+        GroupUrlPermissions(group=group, url='reports/', http_method='GET'),
+        # Leading slash and ALL
+        GroupUrlPermissions(group=group, url='/open/', http_method='ALL'),
+        GroupUrlPermissions(group=group, url='items/<int:pk>/', http_method='POST', is_active=False),
+        GroupUrlPermissions(group=group, url='missing/', http_method='GET'),
+        GroupUrlPermissions(group=group, url='name:reports', http_method='GET'),
+        GroupUrlPermissions(group=auditors, url='*/', http_method='DELETE'),
+        GroupUrlPermissions(group=auditors, url='items/*/', http_method='ALL'),
+    ])
+
+    bits = ReportCommand().get_group_bits(routes)
+
+    def routes_of(group_id, method):
+        return [route for index, route in enumerate(routes) if bits[group_id][method] >> index & 1]
+
+    assert {method: routes_of(group.pk, method) for method in METHODS} == {
+        method: ['open/', 'reports/'] if method == 'GET' else ['open/'] for method in METHODS
+    }
+    assert {method: routes_of(auditors.pk, method) for method in METHODS} == {
+        method: ['items/<int:pk>/', 'open/', 'reports/'] if method == 'DELETE' else ['items/<int:pk>/']
+        for method in METHODS
+    }
+
+
+def test_report_superuser_reaches_every_route(user, group):
+    User.objects.create_superuser('admin', password='password')
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    stdout = io.StringIO()
+
+    call_command('report_url_permissions', '--prefix', '/reports', '--prefix', 'items', stdout=stdout)
+
+    records = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    # Users come in id order, their routes in route order
+    assert records == [
+        {'user': 'member', 'route': 'reports/', 'methods': ['GET']},
+        {'user': 'admin', 'route': 'items/<int:pk>/', 'methods': list(METHODS)},
+        {'user': 'admin', 'route': 'reports/', 'methods': list(METHODS)},
+    ]
+
+
+def test_report_csv(tmp_path, user, group):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='POST')
+    path = tmp_path / 'report.csv'
+
+    call_command('report_url_permissions', str(path), '--prefix', 'reports', stdout=io.StringIO())
+
+    assert path.read_text().splitlines() == [
+        ','.join(('user', 'route') + METHODS),
+        ','.join(['member', 'reports/'] + ['1' if method == 'POST' else '0' for method in METHODS]),
+    ]
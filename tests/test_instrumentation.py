@@ -0,0 +1,228 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import logging
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from django_url_group_permissions import instrumentation
+from django_url_group_permissions.instrumentation import (
+    ALLOW, DENY, NULL_TRACKER, Decision, Tracker, get_hooks, get_metrics, record_metrics, reset_metrics,
+)
+from django_url_group_permissions.middleware import UrlPermissionMiddleware
+
+decisions = []
+
+
+def recording_hook(request, decision):
+    decisions.append(decision)
+
+
+def failing_hook(request, decision):
+    raise RuntimeError('hook failed')
+
+
+@pytest.fixture(autouse=True)
+def fresh_decisions():
+    decisions.clear()
+    reset_metrics()
+    yield
+    reset_metrics()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    class Clock:
+        now = 100.0
+
+        def advance(self, seconds):
+            self.now += seconds
+
+    clock = Clock()
+    monkeypatch.setattr(instrumentation.time, 'perf_counter', lambda: clock.now)
+    return clock
+
+
+def make_request():
+    request = RequestFactory().get('/reports/')
+    request.user = AnonymousUser()
+    return request
+
+
+def test_tracker_times_each_phase(clock):
+    request = make_request()
+    tracker = Tracker(request, '/reports/', [recording_hook], count_queries=False)
+
+    clock.advance(0.001)
+    tracker.mark('path')
+    clock.advance(0.002)
+    tracker.mark('resolve')
+    tracker.set_route('reports/')
+    clock.advance(0.004)
+    tracker.mark('path')
+    response = HttpResponse(status=403)
+
+    assert tracker.finish(DENY, response) is response
+
+    decision, = decisions
+    assert decision is request.url_permission_decision
+    assert decision.phases == pytest.approx({'path': 0.005, 'resolve': 0.002})
+    assert decision.duration == pytest.approx(0.007)
+    assert (decision.outcome, decision.route, decision.method, decision.path) == (DENY, 'reports/', 'GET', '/reports/')
+    assert decision.queries is None
+
+
+def test_tracker_without_route():
+    tracker = Tracker(make_request(), '/missing/', [recording_hook], count_queries=False)
+    tracker.set_route(None)
+    tracker.finish(ALLOW)
+
+    assert decisions[0].route == '-'
+
+
+@pytest.mark.django_db
+def test_tracker_counts_queries_until_stopped():
+    wrappers = list(connection.execute_wrappers)
+    tracker = Tracker(make_request(), '/reports/', [recording_hook])
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+        cursor.execute('SELECT 2')
+
+    tracker.stop()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 3')
+    tracker.finish(ALLOW)
+
+    assert decisions[0].queries == 2
+    assert connection.execute_wrappers == wrappers
+
+
+def test_hook_exceptions_are_logged_and_swallowed(caplog):
+    tracker = Tracker(make_request(), '/reports/', [failing_hook, recording_hook], count_queries=False)
+    response = HttpResponse()
+
+    with caplog.at_level(logging.ERROR, logger=instrumentation.__name__):
+        assert tracker.finish(ALLOW, response) is response
+
+    assert len(decisions) == 1
+    record, = caplog.records
+    assert 'failing_hook' in record.getMessage()
+    assert record.exc_info[0] is RuntimeError
+
+
+def test_get_hooks(settings):
+    settings.URL_PERMISSION_INSTRUMENTATION = True
+    settings.URL_PERMISSION_INSTRUMENTATION_HOOKS = [f'{__name__}.recording_hook', failing_hook]
+
+    assert get_hooks() == [record_metrics, recording_hook, failing_hook]
+
+
+def test_no_hooks_by_default():
+    assert get_hooks() == []
+
+
+def test_null_tracker_when_instrumentation_is_off():
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+    wrappers = list(connection.execute_wrappers)
+
+    tracker = middleware.start_tracking(make_request(), '/reports/')
+
+    assert tracker is NULL_TRACKER
+    assert connection.execute_wrappers == wrappers
+    response = HttpResponse()
+    assert tracker.finish(ALLOW, response) is response
+
+
+@pytest.mark.parametrize('setting', ['URL_PERMISSION_INSTRUMENTATION_HOOKS', 'URL_PERMISSION_SERVER_TIMING'])
+def test_tracker_when_instrumentation_is_on(settings, setting):
+    setattr(settings, setting, [recording_hook] if setting.endswith('HOOKS') else True)
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+
+    tracker = middleware.start_tracking(make_request(), '/reports/', count_queries=False)
+
+    assert isinstance(tracker, Tracker)
+
+
+def test_server_timing_header(settings):
+    settings.URL_PERMISSION_SERVER_TIMING = True
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+    request = make_request()
+    request.url_permission_decision = Decision(
+        ALLOW, 'reports/', 'GET', '/reports/', None, {'path': 0.001, 'permission': 0.0025}, 0.0035, 1,
+    )
+
+    response = middleware.process_response(request, HttpResponse())
+
+    assert response['Server-Timing'] == 'urlperm-path;dur=1.000, urlperm-permission;dur=2.500'
+
+
+def test_server_timing_merges_existing_header(settings):
+    settings.URL_PERMISSION_SERVER_TIMING = True
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+    request = make_request()
+    request.url_permission_decision = Decision(
+        ALLOW, 'reports/', 'GET', '/reports/', None, {'path': 0.001}, 0.001, 1,
+    )
+    response = HttpResponse()
+    response['Server-Timing'] = 'db;dur=4.2'
+
+    middleware.process_response(request, response)
+
+    assert response['Server-Timing'] == 'db;dur=4.2, urlperm-path;dur=1.000'
+
+
+def test_server_timing_off(settings):
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+    request = make_request()
+    request.url_permission_decision = Decision(
+        ALLOW, 'reports/', 'GET', '/reports/', None, {'path': 0.001}, 0.001, 1,
+    )
+
+    assert not middleware.process_response(request, HttpResponse()).has_header('Server-Timing')
+
+
+@pytest.mark.django_db
+def test_request_decision_is_reported(member_client, settings):
+    settings.URL_PERMISSION_INSTRUMENTATION = True
+    settings.URL_PERMISSION_SERVER_TIMING = True
+    settings.URL_PERMISSION_INSTRUMENTATION_HOOKS = [recording_hook]
+
+    response = member_client.get('/reports/')
+
+    assert response.status_code == 403
+    decision, = decisions
+    assert (decision.outcome, decision.route, decision.user.username) == (DENY, 'reports/', 'member')
+    assert list(decision.phases) == ['path', 'resolve', 'user', 'permission']
+    # Session, user and one permission query
+    assert decision.queries == 3
+    assert response['Server-Timing'] == decision.server_timing()
+    metrics = get_metrics()
+    assert metrics['url_permission_decisions_total'] == {(DENY, 'reports/'): 1}
+    assert metrics['url_permission_decision_queries'][('reports/',)]['count'] == 1
@@ -0,0 +1,131 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import pytest
+
+from django_url_group_permissions.matching import UrlMatcher, compile_patterns, compile_prefixes, is_pattern
+
+
+@pytest.mark.parametrize('pattern, url, expected', [
+    # Literal segments, with and without the leading slash
+    ('api/reports/', 'api/reports/', True),
+    ('api/reports/', '/api/reports/', True),
+    ('api/reports/', 'api/other/', False),
+    # Trailing slashes are significant
+    ('api/reports/', 'api/reports', False),
+    ('api/reports', 'api/reports/', False),
+    # * is exactly one non-empty segment
+    ('api/*/users/', 'api/42/users/', True),
+    ('api/*/users/', 'api/users/', False),
+    ('api/*/users/', 'api/1/2/users/', False),
+    ('api/*/users/', 'api//users/', False),
+    ('api/*', 'api/', False),
+    # ** in the middle is zero or more segments
+    ('api/**/users/', 'api/users/', True),
+    ('api/**/users/', 'api/1/users/', True),
+    ('api/**/users/', 'api/1/2/3/users/', True),
+    ('api/**/users/', 'api/1/2/3/teams/', False),
+    # ** at the end matches everything below, and the prefix itself
+    ('api/**', 'api', True),
+    ('api/**', 'api/', True),
+    ('api/**', 'api/a/b/c/', True),
+    ('api/**', 'apis/', False),
+    ('**', 'anything/at/all/', True),
+    # <path:> is one or more segments
+    ('files/<path:name>', 'files/a.txt', True),
+    ('files/<path:name>', 'files/a/b/c.txt', True),
+    ('files/<path:name>', 'files/', False),
+    ('files/<path:name>', 'files', False),
+    # Converters match like in path(), and their own literal text
+    ('api/<int:pk>/', 'api/42/', True),
+    ('api/<int:pk>/', 'api/abc/', False),
+    ('api/<int:pk>/', 'api/<int:pk>/', True),
+    ('api/<slug:slug>/', 'api/a-b_c/', True),
+    ('api/<slug:slug>/', 'api/a.b/', False),
+    ('api/<name>/', 'api/anything/', True),
+    ('api/<uuid:id>/', 'api/12345678-1234-5678-1234-567812345678/', True),
+    ('api/<uuid:id>/', 'api/1234/', False),
+    # Converters inside a segment
+    ('api/v<int:version>/', 'api/v2/', True),
+    ('api/v<int:version>/', 'api/vx/', False),
+    # Empty segments are literal
+    ('api//users/', 'api//users/', True),
+    ('api//users/', 'api/users/', False),
+    ('', '', True),
+    ('', 'api/', False),
+])
+def test_match(pattern, url, expected):
+    assert UrlMatcher([(pattern, True)]).matches(url) is expected
+
+
+def test_match_collects_every_matching_value():
+    matcher = UrlMatcher([
+        ('api/new/', 'literal'),
+        ('api/<int:pk>/', 'converter'),
+        ('api/*/', 'wildcard'),
+        ('api/**', 'globstar'),
+        ('other/**', 'other'),
+    ])
+
+    assert matcher.match('api/new/') == {'literal', 'wildcard', 'globstar'}
+    assert matcher.match('api/7/') == {'converter', 'wildcard', 'globstar'}
+    assert matcher.match('api/') == {'globstar'}
+    assert matcher.match('missing/') == set()
+    assert len(matcher) == 5
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('api/reports/', False),
+    ('api/*/', True),
+    ('api/**', True),
+    ('api/<int:pk>/', True),
+])
+def test_is_pattern(url, expected):
+    assert is_pattern(url) is expected
+
+
+def test_compiled_patterns_are_cached():
+    patterns = frozenset(['api/*/', 'files/<path:name>'])
+
+    assert compile_patterns(patterns) is compile_patterns(frozenset(patterns))
+    assert compile_patterns(patterns).matches('files/a/b')
+
+
+@pytest.mark.parametrize('path, expected', [
+    ('/admin/', True),
+    ('/admin/auth/', True),
+    ('/api/docs/', True),
+    ('/api/', False),
+    ('/public', False),
+])
+def test_compile_prefixes(path, expected):
+    regex = compile_prefixes(['/admin/', '/api/docs/', '/api/docs/v2/', '/public/'])
+
+    assert (regex.match(path) is not None) is expected
+
+
+def test_compile_no_prefixes():
+    assert compile_prefixes([]) is None
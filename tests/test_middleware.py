@@ -0,0 +1,138 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.test import AsyncClient
+
+from django_url_group_permissions.middleware import UrlPermissionMiddleware
+from django_url_group_permissions.models import GroupUrlPermissions
+
+pytestmark = pytest.mark.django_db
+
+MODES = ('request', 'view')
+ENGINES = ('database', 'snapshot', 'cache')
+
+
+@pytest.fixture(params=MODES)
+def mode(request, settings):
+    settings.URL_PERMISSION_MODE = request.param
+    return request.param
+
+
+@pytest.mark.parametrize('path', ['/open/', '/missing/'])
+def test_unprotected_route_needs_no_query(member_client, mode, django_assert_num_queries, path):
+    # Neither the session nor the user is loaded
+    with django_assert_num_queries(0):
+        member_client.get(path)
+
+
+def test_exempt_url_needs_no_query(member_client, settings, django_assert_num_queries):
+    settings.URL_PERMISSION_EXEMPT_URLS = ['/reports/']
+    settings.URL_PERMISSION_CHECK_ALL_VIEWS = True
+
+    with django_assert_num_queries(0):
+        assert member_client.get('/reports/').status_code == 200
+
+
+def test_protected_route_loads_user_once(member_client, mode, django_assert_num_queries):
+    # Session, user and one permission query
+    with django_assert_num_queries(3):
+        assert member_client.get('/reports/').status_code == 403
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_decisions(member_client, group, settings, mode, engine):
+    settings.URL_PERMISSION_ENGINE = engine
+    GroupUrlPermissions.objects.create(
+        group=group, url='items/<int:pk>/' if mode == 'view' else 'reports/', http_method='GET',
+    )
+    allowed = '/items/7/' if mode == 'view' else '/reports/'
+
+    assert member_client.get(allowed).status_code == 200
+    assert member_client.post(allowed).status_code == 403
+    assert member_client.get('/items/7/' if mode == 'request' else '/reports/').status_code == 403
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+@pytest.mark.parametrize('url, path', [
+    # '*' would match the url name 'reports'
+    ('*', '/reports/'),
+    # The path 'item' is not the url name 'item'
+    ('item', '/items/3/'),
+    ('name:*', '/reports/'),
+])
+def test_url_names_are_not_paths(member_client, group, settings, engine, url, path):
+    settings.URL_PERMISSION_MODE = 'view'
+    settings.URL_PERMISSION_ENGINE = engine
+    GroupUrlPermissions.objects.create(group=group, url=url, http_method='GET')
+
+    assert member_client.get(path).status_code == 403
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_url_name_permission(member_client, group, settings, engine):
+    settings.URL_PERMISSION_MODE = 'view'
+    settings.URL_PERMISSION_ENGINE = engine
+    GroupUrlPermissions.objects.create(group=group, url='name:item', http_method='GET')
+
+    assert member_client.get('/items/3/').status_code == 200
+    assert member_client.get('/reports/').status_code == 403
+
+
+def test_path_is_never_a_url_name():
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+
+    assert middleware.get_path_urls('/reports/') == ['/reports/']
+    assert middleware.get_path_urls('/name:item') == []
+
+
+def test_anonymous_user_is_skipped(client):
+    assert client.get('/reports/').status_code == 200
+
+
+def test_async_decisions(user, group, mode):
+    client = AsyncClient()
+    client.force_login(user)
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    get = async_to_sync(client.get)
+
+    assert get('/open/').status_code == 200
+    assert get('/items/7/').status_code == 403
+    assert get('/reports/').status_code == 200
+    assert async_to_sync(client.post)('/reports/').status_code == 403
+
+
+def test_protection_is_resolved_once_per_path(rf):
+    middleware = UrlPermissionMiddleware(lambda request: HttpResponse())
+    request = rf.get('/items/7/')
+
+    assert middleware.resolve_protection(request, '/items/7/') == ('items/<int:pk>/', True)
+    assert middleware.resolve_protection(request, '/items/7/') == ('items/<int:pk>/', True)
+    assert middleware.resolve_protection(request, '/open/') == ('open/', False)
+    info = middleware._resolve_protection.cache_info()
+    assert (info.hits, info.misses) == (1, 2)
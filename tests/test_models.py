@@ -0,0 +1,167 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import json
+
+import pytest
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from django_url_group_permissions.models import GroupUrlPermissionMask, GroupUrlPermissions
+
+pytestmark = pytest.mark.django_db
+
+PERMISSIONS_TABLE = GroupUrlPermissions._meta.db_table
+
+
+def permission_queries(queries):
+    return [query['sql'] for query in queries.captured_queries if PERMISSIONS_TABLE in query['sql']]
+
+
+@pytest.mark.parametrize('url, method, expected', [
+    ('/reports/', 'GET', True),
+    ('reports/', 'POST', False),
+    ('items/7/', 'GET', True),
+    ('missing/', 'GET', False),
+])
+def test_lookup_is_one_query(user, group, django_assert_num_queries, url, method, expected):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    GroupUrlPermissions.objects.create(group=group, url='items/<int:pk>/', http_method='ALL')
+
+    with django_assert_num_queries(1):
+        assert GroupUrlPermissions.has_url_permission(user, url, method) is expected
+
+
+def test_lookup_filters_through_user_groups_only(user, group):
+    GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+
+    with CaptureQueriesContext(connection) as queries:
+        GroupUrlPermissions.has_url_permission(user, 'reports/', 'GET')
+
+    sql, = permission_queries(queries)
+    # The user's groups come from auth_user_groups in a semi-join, without
+    # joining auth_group
+    assert 'JOIN' not in sql
+    assert '"auth_group"' not in sql
+    assert '"group_id" IN (SELECT U0."group_id"' in sql
+    assert 'FROM "auth_user_groups" U0 WHERE U0."user_id" = %s' % user.pk in sql
+    assert '"http_method" IN' in sql
+
+
+def test_pattern_flag_follows_url(group):
+    permission = GroupUrlPermissions.objects.create(group=group, url='api/*/', http_method='GET')
+    GroupUrlPermissions.objects.bulk_create([
+        GroupUrlPermissions(group=group, url='items/<int:pk>/', http_method='GET'),
+        GroupUrlPermissions(group=group, url='reports/', http_method='GET'),
+    ])
+
+    assert dict(GroupUrlPermissions.objects.values_list('url', 'is_pattern')) == {
+        'api/*/': True, 'items/<int:pk>/': True, 'reports/': False,
+    }
+    GroupUrlPermissions.objects.filter(pk=permission.pk).update(url='open/')
+    assert not GroupUrlPermissions.objects.get(pk=permission.pk).is_pattern
+
+
+def test_loaddata_flags_patterns(tmp_path, user, group):
+    fixture = tmp_path / 'permissions.json'
+    fixture.write_text(json.dumps([{
+        'model': 'django_url_group_permissions.groupurlpermissionmask',
+        'fields': {
+            'group': group.pk, 'url': 'items/*/', 'methods': 1,
+            'created_at': '2025-01-01T00:00:00Z', 'updated_at': '2025-01-01T00:00:00Z',
+        },
+    }]))
+    call_command('loaddata', str(fixture), verbosity=0)
+
+    assert GroupUrlPermissionMask.has_url_permission(user, 'items/3/', 'GET')
+
+
+def test_superuser_needs_no_query(django_assert_num_queries):
+    superuser = User(username='root', is_superuser=True)
+
+    with django_assert_num_queries(0):
+        assert GroupUrlPermissions.has_url_permission(superuser, 'anything/', 'DELETE')
+
+
+def test_any_url_is_one_query(user, group, django_assert_num_queries):
+    GroupUrlPermissions.objects.create(group=group, url='reports', http_method='GET')
+
+    with django_assert_num_queries(1):
+        assert GroupUrlPermissions.has_any_url_permission(user, ['reports/', 'reports'], 'GET')
+    with django_assert_num_queries(1):
+        assert not GroupUrlPermissions.has_any_url_permission(user, ['reports/', 'open'], 'GET')
+
+
+def test_other_groups_are_ignored(user, group):
+    other = Group.objects.create(name='other')
+    GroupUrlPermissions.objects.create(group=other, url='reports/', http_method='GET')
+
+    assert not GroupUrlPermissions.has_url_permission(user, 'reports/', 'GET')
+
+
+def test_bitmask_lookup_is_one_query(user, group, django_assert_num_queries):
+    GroupUrlPermissionMask.objects.create(group=group, url='reports/', methods=0b11)
+
+    with django_assert_num_queries(1):
+        assert GroupUrlPermissionMask.has_url_permission(user, 'reports/', 'POST')
+    assert not GroupUrlPermissionMask.has_url_permission(user, 'reports/', 'DELETE')
+
+
+def query_plan(queryset):
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+@pytest.mark.skipif(connection.vendor != 'sqlite', reason='EXPLAIN QUERY PLAN is SQLite syntax')
+@pytest.mark.parametrize('model, lookup_index, pattern_index', [
+    (GroupUrlPermissions, 'url_perm_lookup_idx', 'url_perm_pattern_idx'),
+    (GroupUrlPermissionMask, 'url_perm_mask_lookup_idx', 'url_perm_mask_pattern_idx'),
+])
+def test_lookup_query_plan(user, model, lookup_index, pattern_index):
+    plan = query_plan(model._candidate_urls(user, 'GET', ['reports/', 'reports']))
+    table = model._meta.db_table
+    steps = [step for step in plan if f' {table} ' in step]
+
+    # The exact URLs are an equality seek on the lookup index, answered
+    # from the index alone, and the pattern rows come from their partial
+    # index. The table is never scanned.
+    assert steps[0].startswith(f'SEARCH {table} USING COVERING INDEX {lookup_index} (url=?')
+    assert steps[1].startswith(f'SEARCH {table} USING INDEX {pattern_index} (group_id=?')
+    assert len(steps) == 2
+
+
+def test_lookup_queries_have_no_like(user):
+    with CaptureQueriesContext(connection) as queries:
+        GroupUrlPermissions.has_url_permission(user, 'reports/', 'GET')
+        GroupUrlPermissions.has_url_permissions(user, [('reports/', 'GET'), ('open/', 'POST')])
+
+    for sql in permission_queries(queries):
+        assert ' LIKE ' not in sql
+        assert '"url" IN (' in sql
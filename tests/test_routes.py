@@ -0,0 +1,96 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import json
+import logging
+
+import pytest
+from django.core.management import call_command
+
+from django_url_group_permissions import routes
+from django_url_group_permissions.engines import DatabaseEngine
+from django_url_group_permissions.models import GroupUrlPermissions, UrlRoute
+
+pytestmark = pytest.mark.django_db
+
+
+def test_sync_creates_and_marks_stale_routes():
+    UrlRoute.objects.create(route='removed/')
+
+    counts = routes.sync_url_routes()
+
+    assert counts['stale'] == 1
+    assert set(UrlRoute.objects.filter(is_stale=False).values_list('route', flat=True)) >= {
+        'reports/', 'items/<int:pk>/', 'open/',
+    }
+    assert UrlRoute.objects.get(route='removed/').is_stale
+
+
+def test_sync_revives_routes():
+    routes.sync_url_routes()
+    UrlRoute.objects.filter(route='reports/').update(is_stale=True)
+
+    assert routes.sync_url_routes()['revived'] == 1
+    assert not UrlRoute.objects.get(route='reports/').is_stale
+
+
+def test_loaddata_rows_are_found(tmp_path, user, group):
+    fixture = tmp_path / 'permissions.json'
+    fixture.write_text(json.dumps([{
+        'model': 'django_url_group_permissions.groupurlpermissions',
+        'fields': {
+            'group': group.pk, 'url': 'reports/', 'http_method': 'GET',
+            'created_at': '2025-01-01T00:00:00Z', 'updated_at': '2025-01-01T00:00:00Z',
+        },
+    }]))
+    call_command('loaddata', str(fixture), verbosity=0)
+
+    assert DatabaseEngine().has_url_permission(user, '/reports/', 'GET')
+
+
+def test_changed_url_is_not_found_by_old_url(user, group):
+    permission = GroupUrlPermissions.objects.create(group=group, url='reports/', http_method='GET')
+    GroupUrlPermissions.objects.filter(pk=permission.pk).update(url='open/')
+
+    engine = DatabaseEngine()
+    assert not engine.has_url_permission(user, '/reports/', 'GET')
+    assert engine.has_url_permission(user, '/open/', 'GET')
+
+
+def test_sync_after_migrate_skips_without_urlconf(settings, django_assert_num_queries):
+    settings.ROOT_URLCONF = None
+
+    with django_assert_num_queries(0):
+        routes.sync_routes_after_migrate()
+
+
+def test_sync_after_migrate_logs_broken_urlconf(settings, caplog):
+    settings.ROOT_URLCONF = 'tests.missing_urls'
+
+    with caplog.at_level(logging.WARNING, logger='django_url_group_permissions.routes'):
+        routes.sync_routes_after_migrate()
+
+    assert 'run sync_url_routes' in caplog.text
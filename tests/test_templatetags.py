@@ -0,0 +1,138 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import pytest
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.template import Context, Template
+
+from django_url_group_permissions.models import GroupUrlPermissionMask, GroupUrlPermissions
+from django_url_group_permissions.utils import check_url_permissions
+
+pytestmark = pytest.mark.django_db
+
+ENGINES = ('database', 'snapshot', 'cache')
+MENU = [f'/menu/{index}/' for index in range(40)]
+
+
+@pytest.fixture
+def permissions(group):
+    GroupUrlPermissions.objects.bulk_create([
+        GroupUrlPermissions(group=group, url='reports/', http_method='GET'),
+        GroupUrlPermissions(group=group, url='menu/1/', http_method='ALL'),
+        GroupUrlPermissions(group=group, url='menu/<int:pk>/', http_method='POST'),
+        GroupUrlPermissions(group=group, url='teams/*/', http_method='GET'),
+    ])
+
+
+@pytest.fixture
+def menu_request(rf, user):
+    request = rf.get('/')
+    request.user = user
+    return request
+
+
+def render(source, request):
+    return Template('{% load url_permissions %}' + source).render(Context({'request': request}))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_menu_loads_permissions_once(menu_request, permissions, settings, engine, django_assert_max_num_queries):
+    settings.URL_PERMISSION_ENGINE = engine
+    links = ''.join(f"{{% if request|can_access:'{url}' %}}{url} {{% endif %}}" for url in MENU)
+
+    # The user's permissions, plus their group ids and the snapshot
+    with django_assert_max_num_queries(2):
+        assert render(links, menu_request).split() == ['/menu/1/']
+    with django_assert_max_num_queries(0):
+        assert render("{% if request|can_access:'/teams/7/' %}teams{% endif %}", menu_request) == 'teams'
+
+
+def test_database_engine_menu_is_one_query(menu_request, permissions, django_assert_num_queries):
+    links = ''.join(f"{{{{ request|can_access:'{url}' }}}}" for url in MENU + ['/reports/'])
+
+    with django_assert_num_queries(1):
+        render(links, menu_request)
+
+
+def test_url_permissions_tag(menu_request, permissions):
+    source = (
+        "{% url_permissions '/menu/1/' '/menu/2/' '/reports/' method='post' as allowed %}"
+        "{{ allowed|get_item:'/menu/1/' }} {{ allowed|get_item:'/menu/2/' }} {{ allowed|get_item:'/reports/' }}"
+    )
+
+    assert render(source, menu_request) == 'True True False'
+
+
+def test_anonymous_and_superuser_need_no_query(rf, django_assert_num_queries):
+    request = rf.get('/')
+
+    request.user = AnonymousUser()
+    with django_assert_num_queries(0):
+        assert check_url_permissions(request, [('/reports/', 'GET')]) == {('/reports/', 'GET'): False}
+    request = rf.get('/')
+    request.user = User(username='root', is_superuser=True)
+    with django_assert_num_queries(0):
+        assert check_url_permissions(request, [('/reports/', 'GET')]) == {('/reports/', 'GET'): True}
+
+
+@pytest.mark.parametrize('model', [GroupUrlPermissions, GroupUrlPermissionMask])
+def test_has_url_permissions(user, group, settings, model, django_assert_num_queries):
+    if model is GroupUrlPermissionMask:
+        settings.URL_PERMISSION_STORAGE = 'bitmask'
+        GroupUrlPermissionMask.objects.bulk_create([
+            GroupUrlPermissionMask(group=group, url='reports/', methods=0b1),
+            GroupUrlPermissionMask(group=group, url='items/<int:pk>/', methods=0b10000000),
+            GroupUrlPermissionMask(group=group, url='off/', methods=0b1, is_active=False),
+        ])
+    else:
+        GroupUrlPermissions.objects.bulk_create([
+            GroupUrlPermissions(group=group, url='reports/', http_method='GET'),
+            GroupUrlPermissions(group=group, url='items/<int:pk>/', http_method='ALL'),
+            GroupUrlPermissions(group=group, url='off/', http_method='GET', is_active=False),
+        ])
+    checks = [
+        ('/reports/', 'get'), ('reports/', 'POST'), ('/items/3/', 'DELETE'),
+        ('items/x/', 'GET'), ('off/', 'GET'), ('missing/', 'GET'),
+    ]
+
+    with django_assert_num_queries(1):
+        decisions = model.has_url_permissions(user, checks)
+
+    assert decisions == {
+        ('/reports/', 'get'): True, ('reports/', 'POST'): False, ('/items/3/', 'DELETE'): True,
+        ('items/x/', 'GET'): False, ('off/', 'GET'): False, ('missing/', 'GET'): False,
+    }
+
+
+def test_has_url_permissions_with_group_ids(user, group, django_assert_num_queries):
+    other = Group.objects.create(name='other')
+    GroupUrlPermissions.objects.create(group=other, url='reports/', http_method='GET')
+
+    with django_assert_num_queries(1) as queries:
+        decisions = GroupUrlPermissions.has_url_permissions(user, [('reports/', 'GET')], group_ids=[other.pk])
+
+    assert decisions == {('reports/', 'GET'): True}
+    assert 'auth_user_groups' not in queries.captured_queries[0]['sql']
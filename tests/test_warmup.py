@@ -0,0 +1,128 @@
+# Copyright (c) 2024 IT ELAZOS SL
+# All rights reserved.
+#
+# MIT License
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+#
+# This source code is part of the "django_url_group_permissions" project.
+# Intellectual property of IT ELAZOS SL.
+
+import logging
+import time
+
+import pytest
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse
+from django.urls import clear_url_caches
+
+from django_url_group_permissions import warmup
+from django_url_group_permissions.middleware import UrlPermissionMiddleware
+from django_url_group_permissions.snapshot import invalidate_snapshot
+
+pytestmark = pytest.mark.django_db
+
+STEP_NAMES = [name for name, _ in warmup.STEPS]
+
+
+@pytest.fixture
+def no_report(monkeypatch):
+    monkeypatch.setattr(warmup, '_report', None)
+
+
+def test_report_times_every_step(caplog):
+    clear_url_caches()
+
+    with caplog.at_level(logging.INFO, logger='django_url_group_permissions.warmup'):
+        report = warmup.warmup()
+
+    assert [(name, status) for name, _, status in report.steps] == [(name, 'ok') for name in STEP_NAMES]
+    assert all(seconds >= 0 for _, seconds, _ in report.steps)
+    assert report.total == sum(seconds for _, seconds, _ in report.steps)
+    assert str(report) in caplog.text
+
+
+def test_startup_stays_within_budget():
+    clear_url_caches()
+    start = time.perf_counter()
+    report = warmup.warmup(budget=5.0)
+    elapsed = time.perf_counter() - start
+
+    assert report.total <= elapsed < 5.0
+
+
+def test_warm_process_serves_first_request_without_cold_work(
+    member_client, settings, django_assert_num_queries,
+):
+    settings.URL_PERMISSION_ENGINE = 'snapshot'
+    # Cold: the first request also loads the snapshot
+    with django_assert_num_queries(4):
+        member_client.get('/reports/')
+
+    invalidate_snapshot()
+    warmup.warmup()
+    # Warm: session, user and the user's groups
+    with django_assert_num_queries(3):
+        assert member_client.get('/reports/').status_code == 403
+
+
+def test_budget_skips_remaining_steps(monkeypatch):
+    calls = []
+    monkeypatch.setattr(warmup, 'STEPS', (
+        ('slow', lambda: time.sleep(0.05) or calls.append('slow')),
+        ('next', lambda: calls.append('next')),
+    ))
+
+    report = warmup.warmup(budget=0.01)
+
+    assert calls == ['slow']
+    assert [(name, status) for name, _, status in report.steps] == [('slow', 'ok'), ('next', 'skipped')]
+
+
+def test_failing_step_is_reported(monkeypatch, caplog):
+    def broken():
+        raise RuntimeError('no cache')
+
+    monkeypatch.setattr(warmup, 'STEPS', (('broken', broken), ('next', lambda: None)))
+
+    report = warmup.warmup()
+
+    assert [status for _, _, status in report.steps] == ['failed', 'ok']
+    assert 'no cache' in caplog.text
+
+
+def test_middleware_warms_up_once(settings, no_report, monkeypatch):
+    settings.URL_PERMISSION_WARMUP = True
+    runs = []
+    monkeypatch.setattr(warmup, 'STEPS', (('count', lambda: runs.append(1)),))
+
+    UrlPermissionMiddleware(lambda request: HttpResponse())
+    UrlPermissionMiddleware(lambda request: HttpResponse())
+
+    assert runs == [1]
+
+
+def test_warmup_inside_event_loop(no_report):
+    async def load_middleware():
+        # ASGI handlers load middleware on the event loop
+        return warmup.warmup_once()
+
+    report = async_to_sync(load_middleware)()
+
+    assert [status for _, _, status in report.steps] == ['ok'] * len(STEP_NAMES)